@@ -1,11 +1,18 @@
 from __future__ import annotations
-from typing import Optional
+import re
+from array import array
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional
 from a2_support import UserInterface, TextInterface
 from constants import *
+from events import (DoorsUnlocked, Event, ItemCollected, LevelUp, Lost,
+                    PlayerMoved, StatsChanged, Subscriber, Won)
 
 
 class Tile:
     """ An abstract class providing base functionality for tiles on a maze. """
+    __slots__ = ()
     _id = ABSTRACT_TILE
 
     def is_blocking(self) -> bool:
@@ -34,12 +41,14 @@ class Empty(Tile):
     """ A tile representing an empty square. Players can pass over an empty tile
         with no damage.
     """
+    __slots__ = ()
     _id = EMPTY
 
 class Lava(Tile):
     """ A tile representing a square filled with lava. A player can step on lava
         but it causes some damage.
     """
+    __slots__ = ()
     _id = LAVA
 
     def damage(self) -> int:
@@ -47,6 +56,7 @@ class Lava(Tile):
 
 class Wall(Tile):
     """ A simple blocking tile. """
+    __slots__ = ()
     _id = WALL
 
     def is_blocking(self) -> bool:
@@ -56,6 +66,7 @@ class Door(Tile):
     """ A door in the maze. A door starts as blocking, but must be unlocked by
         the player before they can walk through it.
     """
+    __slots__ = ('_blocking',)
     _name = 'Door'
     _id = DOOR
 
@@ -77,17 +88,21 @@ class Door(Tile):
 
 class Entity:
     """ Abstract base class for any entity."""
+    __slots__ = ('_position',)
     _id = 'E'
-    def __init__(self, position: tuple[int, int]) -> None:
+    def __init__(self, position: Optional[tuple[int, int]]) -> None:
         """Sets up the entity at the provided location.
         
         Parameters:
-            postion: (row, column) position of the entity.
+            postion: (row, column) position of the entity, or None for shared
+                     items whose position is only known to the level.
         """
         self._position = position
 
-    def get_position(self) -> tuple[int, int]:
-        """ Returns the (row, column) position of this entity. """
+    def get_position(self) -> Optional[tuple[int, int]]:
+        """ Returns the (row, column) position of this entity, or None if it
+            has no position of its own.
+        """
         return self._position
 
     def get_name(self) -> str:
@@ -109,6 +124,7 @@ class Entity:
 
 class Item(Entity):
     """ Abstract class providing an interface for all items in the game. """
+    __slots__ = ()
     _id = ITEM
 
     def apply(self, player: 'Player') -> None:
@@ -122,6 +138,7 @@ class Item(Entity):
 
 class Potion(Item):
     """ A potion restores the players HP by 20 when applied. """
+    __slots__ = ()
     _id = POTION
 
     def apply(self, player: 'Player') -> None:
@@ -131,6 +148,7 @@ class Potion(Item):
 
 class Coin(Item):
     """ Coins are collected by the player to allow the door to be unlocked. """
+    __slots__ = ()
     _id = COIN
 
     def apply(self, player: 'Player') -> None:
@@ -143,6 +161,7 @@ class Food(Item):
         food item decreases the player's hunger by a set amount depending on the
         type of food.
     """
+    __slots__ = ()
     _id = FOOD
     _amount = 0
 
@@ -153,18 +172,21 @@ class Food(Item):
 
 class Apple(Food):
     """ Apples decrease the players hunger by 1. """
+    __slots__ = ()
     _id = APPLE
     _amount = APPLE_AMOUNT
 
 
 class Honey(Food):
     """ Honey decreases the players hunger by 5. """
+    __slots__ = ()
     _id = HONEY
     _amount = HONEY_AMOUNT
 
 
 class Water(Item):
     """ Water decreases the player's thirst by 5. """
+    __slots__ = ()
     _id = WATER
 
     def apply(self, player: 'Player') -> None:
@@ -173,7 +195,12 @@ class Water(Item):
 
 
 class Inventory:
-    """ A collection of items. """
+    """ A collection of items.
+
+        Items of each name are kept in a queue and handed out first in, first
+        out. Fungible items (see FUNGIBLE_ITEMS) are all alike, so only their
+        count and the first one added are kept.
+    """
     def __init__(self, initial_items: Optional[list[Item]] = None) -> None:
         """ Sets up this inventory with the initial items (if provided). Else
             sets up a new empty inventory.
@@ -181,7 +208,9 @@ class Inventory:
         Parameters:
             initial_items: An optional list of initial items to put in inventory
         """
-        self._items = {}
+        self._counts = {}  # Maps item names to how many are held, in order
+        self._items = {}  # Maps names of non-fungible items to their queue
+        self._samples = {}  # Maps names of fungible items to one instance
         if initial_items is not None:
             for item in initial_items:
                 self.add_item(item)
@@ -192,15 +221,49 @@ class Inventory:
         Parameters:
             item: The item to add
         """
-        items = self._items.get(item.get_name(), [])
-        items.append(item)
-        self._items[item.get_name()] = items
+        name = item.get_name()
+        self._counts[name] = self._counts.get(name, 0) + 1
+        if item.get_id() in FUNGIBLE_ITEMS:
+            self._samples.setdefault(name, item)
+        else:
+            self._items.setdefault(name, deque()).append(item)
 
     def get_items(self) -> dict[str, list[Item]]:
         """ Returns the a dictionary mapping item names to the instances of the
-            item with that name in the inventory.
+            item with that name in the inventory. Fungible items are listed as
+            one instance repeated; use get_counts where counts are enough.
         """
-        return self._items
+        return {
+            name: [self._samples[name]] * count if name in self._samples
+            else list(self._items[name])
+            for name, count in self._counts.items()
+        }
+
+    def get_counts(self) -> dict[str, int]:
+        """ Returns a dictionary mapping the names of items in the inventory to
+            how many of each there are, in the order they were first added.
+        """
+        return self._counts
+
+    def get_count(self, item_name: str) -> int:
+        """ Returns how many items with the given name are in the inventory.
+
+        Parameters:
+            item_name: The name of the item to count.
+        """
+        return self._counts.get(item_name, 0)
+
+    def peek_item(self, item_name: str) -> Optional[Item]:
+        """ Returns the item that remove_item would remove next, without
+            removing it, or None if there is none.
+
+        Parameters:
+            item_name: The name of the item to look at.
+        """
+        if item_name in self._samples:
+            return self._samples[item_name]
+        items = self._items.get(item_name)
+        return items[0] if items else None
 
     def remove_item(self, item_name: str) -> Optional['Item']:
         """ Removes one instance of the item with the given name from inventory,
@@ -213,23 +276,30 @@ class Inventory:
             The removed item, if one exists, else None.
 
         """
-        items = self._items.get(item_name)
-        if items is None or items == []:
+        count = self._counts.get(item_name)
+        if count is None:
             return None
+        if count == 1:
+            del self._counts[item_name]
         else:
-            item = items.pop(0)
-            if self._items.get(item_name) == []:
-                del self._items[item_name]
-            return item
+            self._counts[item_name] = count - 1
+
+        if item_name in self._samples:
+            return self._samples[item_name] if count > 1 \
+                else self._samples.pop(item_name)
+        item = self._items[item_name].popleft()
+        if count == 1:
+            del self._items[item_name]
+        return item
     
     def __str__(self):
-        text = [f'{name}: {len(items)}' for name, items in self._items.items()]
+        text = [f'{name}: {count}' for name, count in self._counts.items()]
         return '\n'.join(text)
     
     def __repr__(self):
         items = []
-        for name in self._items:
-            items.extend(self._items.get(name))
+        for name, name_items in self.get_items().items():
+            items.extend(name_items)
         return f'Inventory(initial_items={items})'
 
 
@@ -239,6 +309,7 @@ class DynamicEntity(Entity):
 
         Note: they'll extend this in A3 to have direction and an Enemy subclass.
     """
+    __slots__ = ()
     _id = DYNAMIC_ENTITY
     
     def set_position(self, new_position: tuple[int, int]) -> None:
@@ -252,6 +323,7 @@ class DynamicEntity(Entity):
 
 class Player(DynamicEntity):
     """ The player in the game. """
+    __slots__ = ('_health', '_hunger', '_thirst', '_inventory')
     _id = PLAYER
 
     def __init__(self, position: tuple[int, int]) -> None:
@@ -329,6 +401,118 @@ class Player(DynamicEntity):
         return self._inventory
 
 
+class GameFileError(ValueError):
+    """ Raised when a game file does not describe a valid set of levels. """
+    def __init__(self, message: str, filename: str, line_num: int,
+                 column: Optional[int] = None) -> None:
+        """ Sets up the error for a problem at a location in a game file.
+
+        Parameters:
+            message: Description of the problem
+            filename: The path to the game file
+            line_num: The line of the file the problem is on, counting from 1
+            column: The column of the line the problem is in, counting from 1
+        """
+        location = f"{filename}:{line_num}"
+        if column is not None:
+            location += f":{column}"
+        super().__init__(f"{location}: {message}")
+        self.filename = filename
+        self.line_num = line_num
+        self.column = column
+
+
+HEADER_PATTERN = re.compile(r'Maze\s+\d+\s+-\s+(\d+)\s+(\d+)\s*$')
+
+
+def iter_levels(filename: str) -> Iterator['Level']:
+    """ Reads a game file one line at a time, yielding each level as soon as
+        all of its rows have been read. Each level is checked against the
+        dimensions declared in its 'Maze N - rows cols' header.
+
+    Parameters:
+        filename: The path to the game file
+
+    Raises:
+        GameFileError: If a header is malformed or declares zero rows or
+            columns, a level has the wrong number of rows or columns, a row
+            contains an unknown character, or a level does not have exactly
+            one player start.
+    """
+    valid_ids = set(Maze.TILES) | set(Level.ENTITIES) | {PLAYER}
+    level, header_num, num_players = None, 0, 0
+
+    def check_complete(line_num: int) -> None:
+        """ Raises an error if the current level is missing rows or a player.
+        """
+        rows_read = level.get_maze().get_num_rows()
+        if rows_read < level.get_dimensions()[0]:
+            raise GameFileError(
+                f"expected {level.get_dimensions()[0]} rows for the maze on "
+                f"line {header_num} but found {rows_read}", filename, line_num
+            )
+
+    with open(filename, 'r') as file:
+        for line_num, line in enumerate(file, start=1):
+            row = line.rstrip('\r\n')
+            if row.startswith('Maze'):
+                if level is not None:
+                    check_complete(line_num)
+                match = HEADER_PATTERN.match(row)
+                if match is None:
+                    raise GameFileError(
+                        "expected a header of the form 'Maze N - rows cols'",
+                        filename, line_num
+                    )
+                dimensions = int(match.group(1)), int(match.group(2))
+                if 0 in dimensions:
+                    raise GameFileError("a maze must have at least one row "
+                                        "and one column", filename, line_num)
+                level, header_num, num_players = Level(dimensions), line_num, 0
+                continue
+            if row.strip() == '':
+                continue
+            if level is None:
+                raise GameFileError("row found before any 'Maze' header",
+                                    filename, line_num, 1)
+
+            num_rows, num_cols = level.get_dimensions()
+            if level.get_maze().get_num_rows() == num_rows:
+                raise GameFileError(
+                    f"maze on line {header_num} has more than {num_rows} rows",
+                    filename, line_num
+                )
+            # Tolerate trailing whitespace past the last column
+            if len(row) > num_cols and row[num_cols:].strip() == '':
+                row = row[:num_cols]
+            if len(row) != num_cols:
+                raise GameFileError(
+                    f"expected {num_cols} columns but found {len(row)}",
+                    filename, line_num, min(len(row), num_cols) + 1
+                )
+            for col_num, char in enumerate(row):
+                if char not in valid_ids:
+                    raise GameFileError(f"unknown character {char!r}",
+                                        filename, line_num, col_num + 1)
+                if char == PLAYER:
+                    num_players += 1
+                    if num_players > 1:
+                        raise GameFileError("more than one player start",
+                                            filename, line_num, col_num + 1)
+
+            level.add_row(row)
+            if level.get_maze().get_num_rows() == num_rows:
+                if num_players == 0:
+                    raise GameFileError(
+                        f"maze on line {header_num} has no player start",
+                        filename, line_num
+                    )
+                yield level
+
+    if level is not None:
+        check_complete(line_num)
+
+
 def load_game(filename: str) -> list['Level']:
     """ Reads a game file and creates a list of all the levels in order.
     
@@ -338,21 +522,16 @@ def load_game(filename: str) -> list['Level']:
     Returns:
         A list of all Level instances to play in the game
     """
-    levels = []
-    with open(filename, 'r') as file:
-        for line in file:
-            line = line.strip()
-            if line.startswith('Maze'):
-                _, _, dimensions = line[5:].partition(' - ')
-                dimensions = [int(item) for item in dimensions.split()]
-                levels.append(Level(dimensions))
-            elif len(line) > 0 and len(levels) > 0:
-                levels[-1].add_row(line)
-    return levels
+    return list(iter_levels(filename))
 
 class Maze:
     """ Models a single map for one level. Only includes ground information,
-        excluding information about entities. """
+        excluding information about entities.
+
+        The grid is stored as one byte per cell holding the tile ID. Tiles
+        have no per-cell state, so every cell of a kind shares one Tile
+        instance; doors share a single Door per maze so they unlock together.
+    """
     TILES = {
         WALL: Wall,
         EMPTY: Empty,
@@ -360,6 +539,17 @@ class Maze:
         LAVA: Lava,
     }
 
+    # Maps every byte to itself if it is a tile ID, else to the empty tile ID
+    _TILE_CODES = bytes(
+        ord(char) if char in (WALL, EMPTY, DOOR, LAVA) else ord(EMPTY)
+        for char in map(chr, range(256))
+    )
+    _SHARED_TILES = {
+        ord(WALL): Wall(),
+        ord(EMPTY): Empty(),
+        ord(LAVA): Lava(),
+    }
+
     def __init__(self, dimensions: tuple[int, int]) -> None:
         """Sets up an empty maze of given dimensions.
         
@@ -367,11 +557,34 @@ class Maze:
             dimensions: (#rows, #columns)
         """
         self._dimensions = dimensions
-        self._tiles = []
+        self._tiles = bytearray()
+        self._doors = []  # Positions of every door, in row order
+        self._door = Door()
+        self._tile_lookup = {**self._SHARED_TILES, ord(DOOR): self._door}
+
+    @classmethod
+    def from_buffer(cls, dimensions: tuple[int, int], tiles: memoryview,
+                    doors: list[tuple[int, int]]) -> Maze:
+        """ Creates a complete maze that reads its tiles straight from a buffer
+            without copying it. The buffer must already hold valid tile IDs.
+
+        Parameters:
+            dimensions: (#rows, #columns)
+            tiles: One tile ID byte per cell, row by row
+            doors: The (row, column) positions of the doors in tiles
+        """
+        maze = cls(dimensions)
+        maze._tiles = tiles
+        maze._doors = doors
+        return maze
     
     def get_dimensions(self) -> tuple[int, int]:
         """ Returns the dimensions of this maze. """
         return self._dimensions
+
+    def get_num_rows(self) -> int:
+        """ Returns the number of rows that have been added to this maze. """
+        return len(self._tiles) // self._dimensions[1]
     
     def add_row(self, row: str) -> None:
         """ Adds a row of tiles to the maze.
@@ -379,21 +592,54 @@ class Maze:
         Parameters:
             row: String of the tile IDs from which to construct Tile instances.
         """
+        if len(row) != self._dimensions[1]:
+            raise ValueError(
+                f"Row has {len(row)} tiles but the maze has "
+                f"{self._dimensions[1]} columns"
+            )
         # If there is an entity in a spot, assume the ground underneath is empty
-        self._tiles.append([self.TILES.get(tile, Empty)() for tile in row])
+        row = row.encode('ascii', errors='replace').translate(self._TILE_CODES)
+        row_num = self.get_num_rows()
+        col = row.find(DOOR.encode())
+        while col != -1:
+            self._doors.append((row_num, col))
+            col = row.find(DOOR.encode(), col + 1)
+        self._tiles.extend(row)
+
+    def get_layout(self) -> bytes:
+        """ Returns the tile IDs of this maze, one byte per cell in row order.
+            Doors are included whether or not they are locked.
+        """
+        return bytes(self._tiles)
 
     def get_tiles(self) -> list[list[Tile]]:
         """ Returns the Tile instances in this maze. Each element is a row of
             Tile instances in order.
         """
-        return self._tiles
+        lookup, num_cols = self._tile_lookup, self._dimensions[1]
+        return [
+            [lookup[code] for code in self._tiles[start:start + num_cols]]
+            for start in range(0, len(self._tiles), num_cols)
+        ]
     
-    def unlock_door(self) -> None:
-        """ Unlocks any doors that exist in the maze. """
-        for row in self._tiles:
-            for tile in row:
-                if isinstance(tile, Door):
-                    tile.unlock()
+    def get_door_positions(self) -> list[tuple[int, int]]:
+        """ Returns the (row, column) positions of all doors in this maze. """
+        return self._doors
+
+    def is_locked(self) -> bool:
+        """ Returns True iff the doors in this maze have not been unlocked. """
+        return self._door.is_blocking()
+
+    def unlock_door(self) -> list[tuple[int, int]]:
+        """ Unlocks any doors that exist in the maze.
+
+        Returns:
+            The positions of the doors that were locked before this call.
+        """
+        if not self.is_locked():
+            return []
+        self._door.unlock()
+        return list(self._doors)
     
     def get_tile(self, position: tuple[int, int]) -> Tile:
         """ Returns the Tile instance at the given position.
@@ -402,12 +648,20 @@ class Maze:
             position: The (row, column) position from which to find the tile.
         """
         row, col = position
-        return self._tiles[row][col]
+        num_cols = self._dimensions[1]
+        if not (0 <= row < self.get_num_rows() and 0 <= col < num_cols):
+            raise IndexError(f"Position {position} is outside the maze")
+        return self._tile_lookup[self._tiles[row * num_cols + col]]
     
     def __str__(self) -> str:
         """ Returns the string representation of this maze. """
+        text = str(self._tiles, 'ascii')
+        if not self._door.is_blocking():
+            text = text.replace(DOOR, EMPTY)
+        num_cols = self._dimensions[1]
         return '\n'.join(
-            [''.join([tile.get_id() for tile in row]) for row in self._tiles]
+            [text[start:start + num_cols]
+             for start in range(0, len(text), num_cols)]
         )
     
     def __repr__(self) -> str:
@@ -415,6 +669,34 @@ class Maze:
         return f"Maze({self._dimensions})"
 
 
+def find_distances(layout: bytes, num_cols: int, start: int,
+                   blocking: set[int]) -> array:
+    """ Runs a BFS over a maze layout and returns the fewest moves from start
+        to every cell, row by row, with -1 for cells that cannot be reached.
+
+    Parameters:
+        layout: One byte per cell, in row order
+        num_cols: The number of columns in the maze
+        start: The index of the cell to measure from
+        blocking: The bytes of the cells that cannot be walked onto
+    """
+    distances = array('i', [-1]) * len(layout)
+    distances[start] = 0
+    queue = deque([start])
+    while queue:
+        cell = queue.popleft()
+        distance = distances[cell] + 1
+        col = cell % num_cols
+        for other in (cell - num_cols, cell + num_cols,
+                      cell - 1 if col > 0 else -1,
+                      cell + 1 if col < num_cols - 1 else -1):
+            if 0 <= other < len(layout) and distances[other] < 0 \
+                    and layout[other] not in blocking:
+                distances[other] = distance
+                queue.append(other)
+    return distances
+
+
 class Level:
     """ Models one level of a game, including maze and entities. """
     ENTITIES = {
@@ -424,16 +706,25 @@ class Level:
         HONEY: Honey,
         WATER: Water,
     }
-
-    def __init__(self, dimensions: tuple[int, int]) -> None:
-        """ Sets up a new level with empty maze and no items or player.
+    # Fungible items hold no state, so every level shares one of each kind and
+    # only the level's item dict knows where they are
+    _SHARED_ITEMS = {item_id: kind(None) for item_id, kind in ENTITIES.items()
+                     if item_id in FUNGIBLE_ITEMS}
+
+    def __init__(self, dimensions: tuple[int, int],
+                 maze: Optional[Maze] = None) -> None:
+        """ Sets up a new level with no items or player.
         
         Parameters:
             dimensions: The (#rows, #columns) in the maze for this level.
+            maze: The maze for this level, if already built. Else an empty maze.
         """
-        self._maze = Maze(dimensions)
+        self._maze = maze if maze is not None else Maze(dimensions)
         self._items = {} # Maps positions to Item instances
+        self._item_counts = {} # Maps item IDs to the number of those items
         self._player_start = None
+        self._distances = {} # Maps positions to their distances to each cell
+        self._distances_locked = True # Whether the doors were locked then
     
     def get_maze(self) -> Maze:
         """ Returns the Maze instance for this level. """
@@ -441,20 +732,99 @@ class Level:
     
     def _contains_coins(self) -> bool:
         """ Returns True iff there are any more coins left in this level. """
-        return any([item.get_id() == COIN for item in self._items.values()])
+        return self.get_item_count(COIN) > 0
 
-    def attempt_unlock_door(self) -> None:
-        """ Unlocks the doors in the maze if there are no coins remaining. """
-        if not self._contains_coins():
-            self._maze.unlock_door()
+    def get_item_count(self, item_id: str) -> int:
+        """ Returns the number of items with the given ID left in this level.
+
+        Parameters:
+            item_id: The ID of the kind of item to count.
+        """
+        return self._item_counts.get(item_id, 0)
+
+    def attempt_unlock_door(self) -> list[tuple[int, int]]:
+        """ Unlocks the doors in the maze if there are no coins remaining.
+
+        Returns:
+            The positions of any doors that were unlocked by this attempt.
+        """
+        if self._maze.is_locked() and not self._contains_coins():
+            return self._maze.unlock_door()
+        return []
     
+    def get_distances(self, position: tuple[int, int]) -> array:
+        """ Returns the fewest moves from position to every cell in the maze,
+            row by row, with -1 for cells that cannot be reached. Locked doors
+            block the way and items do not.
+
+            The result is worked out by BFS the first time a position is
+            asked for (usually an item, a door or the player start) and kept
+            until unlocking the doors could change it.
+
+        Parameters:
+            position: The (row, column) position to measure from.
+        """
+        if self._maze.is_locked() != self._distances_locked:
+            self._forget_door_distances()
+        distances = self._distances.get(position)
+        if distances is None:
+            distances = self._find_distances(position)
+            self._distances[position] = distances
+        return distances
+
+    def get_distance(self, source: tuple[int, int],
+                     target: tuple[int, int]) -> Optional[int]:
+        """ Returns the fewest moves from source to target, or None if target
+            cannot be reached. Moves are reversible, so distances already
+            found from target are used if there are none from source.
+
+        Parameters:
+            source: The (row, column) position to start from.
+            target: The (row, column) position to reach.
+        """
+        if self._maze.is_locked() != self._distances_locked:
+            self._forget_door_distances()
+        if source not in self._distances and target in self._distances:
+            source, target = target, source
+        num_cols = self.get_dimensions()[1]
+        distance = self.get_distances(source)[target[0] * num_cols + target[1]]
+        return None if distance < 0 else distance
+
+    def _find_distances(self, position: tuple[int, int]) -> array:
+        """ Runs a BFS from position over the tiles that are not blocking. """
+        num_cols = self.get_dimensions()[1]
+        blocking = {ord(WALL)}
+        if self._maze.is_locked():
+            blocking.add(ord(DOOR))
+        return find_distances(self._maze.get_layout(), num_cols,
+                              position[0] * num_cols + position[1], blocking)
+
+    def _forget_door_distances(self) -> None:
+        """ Drops the cached distances that change now the doors are
+            unlocked: those from positions that can reach the side of a door.
+        """
+        num_rows, num_cols = self.get_dimensions()
+        beside_doors = [
+            (row + row_delta) * num_cols + col + col_delta
+            for row, col in self._maze.get_door_positions()
+            for row_delta, col_delta in MOVE_DELTAS.values()
+            if 0 <= row + row_delta < num_rows
+            and 0 <= col + col_delta < num_cols
+        ]
+        self._distances = {
+            position: distances
+            for position, distances in self._distances.items()
+            if all(distances[cell] < 0 for cell in beside_doors)
+        }
+        self._distances_locked = self._maze.is_locked()
+
     def add_row(self, row: str) -> None:
         """ Adds the tiles and entities from the row to this level.
         
         Parameters:
             row: A string of tile or entity IDs.
         """
-        row_num = len(self._maze.get_tiles())
+        row_num = self._maze.get_num_rows()
         self._maze.add_row(row)
         for col_num, char in enumerate(row):
             self.add_entity((row_num, col_num), char)
@@ -467,10 +837,26 @@ class Level:
             entity_id: The ID of the entity to add.
         """
         if self.ENTITIES.get(entity_id) is not None:
-            self._items[position] = self.ENTITIES.get(entity_id)(position)
+            if position in self._items:
+                self.remove_item(position)
+            self._items[position] = self.create_item(position, entity_id)
+            self._item_counts[entity_id] = self.get_item_count(entity_id) + 1
         if entity_id == PLAYER:
             self.add_player_start(position)
 
+    @classmethod
+    def create_item(cls, position: Optional[tuple[int, int]],
+                    item_id: str) -> Item:
+        """ Returns an item of the given kind. Fungible items (see
+            FUNGIBLE_ITEMS) are a shared instance with no position.
+
+        Parameters:
+            position: The (row, column) position of the item.
+            item_id: The ID of the kind of item.
+        """
+        shared = cls._SHARED_ITEMS.get(item_id)
+        return shared if shared is not None else cls.ENTITIES[item_id](position)
+
     def get_dimensions(self) -> tuple[int, int]:
         """ Returns the (#rows, #columns) in the level maze. """
         return self._maze.get_dimensions()
@@ -490,7 +876,8 @@ class Level:
         Parameters:
             position: the (row, column) position from which to delete an item.
         """
-        del self._items[position]
+        item_id = self._items.pop(position).get_id()
+        self._item_counts[item_id] -= 1
     
     def add_player_start(self, position: tuple[int, int]) -> None:
         """ Adds the start position for the player in this level.
@@ -516,19 +903,79 @@ class Level:
 
 class Model:
     """ The overall model for a game of MazeRunner """
-    def __init__(self, game_file: str) -> None:
+    def __init__(self, game_file: str,
+                 levels: Optional[Iterable[Level]] = None) -> None:
         """ Constructs a new game.
         
         Parameters:
             game_file: The file containing the levels for this game.
+            levels: The levels to play, if they have already been loaded from
+                    game_file by other means (e.g. a compiled level pack).
         """
-        self._levels = load_game(game_file)
+        # Levels are only parsed once the player reaches them
+        if levels is None:
+            levels = iter_levels(game_file)
+        self._levels = iter(levels)
+        self._level = next(self._levels, None)
+        if self._level is None:
+            raise GameFileError("game file contains no levels", game_file, 1)
         self._level_num = 0
         self._player = Player(self.get_level().get_player_start())
         self._won = False
+        self._error = None
         self._did_level_up = False
         self._num_moves = 0
+        self._changed_cells = set()
         self._game_file = game_file
+        self._subscribers = []
+        self._pending_events = []  # Events waiting for the batch to end
+        self._batch_depth = 0
+
+    def subscribe(self, subscriber: Subscriber) -> None:
+        """ Starts sending the game's events to subscriber (see events.py).
+
+        Parameters:
+            subscriber: Called with each list of events as it is published
+        """
+        self._subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        """ Stops sending events to a subscriber added by subscribe.
+
+        Parameters:
+            subscriber: The subscriber to remove
+        """
+        self._subscribers.remove(subscriber)
+
+    @contextmanager
+    def batch_events(self) -> Iterator[None]:
+        """ Holds back every event published inside the with block and sends
+            them to subscribers as one list when it ends. Batches may nest;
+            events are sent when the outermost one ends.
+        """
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._end_batch()
+
+    def _end_batch(self) -> None:
+        """ Ends a batch, sending its events if it was the outermost one. """
+        self._batch_depth -= 1
+        if self._batch_depth or not self._pending_events:
+            return
+        events, self._pending_events = self._pending_events, []
+        for subscriber in list(self._subscribers):
+            subscriber(events)
+
+    def _publish(self, event: Event) -> None:
+        """ Queues an event for the subscribers. Callers check there are any
+            subscribers first, so that unwatched games build no events.
+        """
+        self._pending_events.append(event)
+        if not self._batch_depth:
+            self._batch_depth += 1
+            self._end_batch()
 
     def has_won(self) -> bool:
         """ Returns True iff the game has been won (i.e. all levels have been
@@ -544,53 +991,127 @@ class Model:
             or self._player.get_hunger() >= MAX_HUNGER \
             or self._player.get_thirst() >= MAX_THIRST
 
+    def get_error(self) -> Optional[GameFileError]:
+        """ Returns the error that stopped the next level from being read, or
+            None. Once there is one, leaving the maze does nothing more.
+        """
+        return self._error
+
+    def close(self) -> None:
+        """ Stops reading levels, closing the game file if it is still open.
+            Called once the game is won or the next level cannot be read;
+            controllers call it when the game ends in other ways.
+        """
+        close = getattr(self._levels, 'close', None)
+        if close is not None:
+            close()
+
     def get_level(self) -> Level:
         """ Returns the current level. """
-        return self._levels[self._level_num]
+        return self._level
     
+    def get_level_num(self) -> int:
+        """ Returns the index of the current level, counting from 0. """
+        return self._level_num
+
     def did_level_up(self) -> True:
         """ Returns True if the player just moved to the next level on the
             previous turn.
         """
         return self._did_level_up
 
+    def get_changed_cells(self) -> set[tuple[int, int]]:
+        """ Returns the positions on the current maze whose tile or entity
+            changed on the previous turn. Empty after a level up, since the
+            whole maze is new.
+        """
+        return self._changed_cells
+
     def level_up(self) -> None:
         """ Changes the level to the next level from the file. If no more levels
             remain, the player has won the game.
         """
-        self._level_num += 1
-        if self._level_num >= len(self._levels):
+        if self._error is not None:
+            return
+        try:
+            next_level = next(self._levels, None)
+        except GameFileError as error:
+            # The game cannot go on, but the model stays usable for reporting
+            self._error = error
+            self.close()
+            return
+        if next_level is None:
             self._won = True
+            self.close()
+            if self._subscribers:
+                self._publish(Won())
         else:
+            self._level = next_level
+            self._level_num += 1
             self._player.set_position(self.get_level().get_player_start())
             self._did_level_up = True
+            if self._subscribers:
+                self._publish(LevelUp(self._level_num,
+                                      next_level.get_dimensions()))
 
     def move_player(self, delta: tuple[int, int]) -> None:
         """ Tries to move the player by the requested amount. Levels up if the
-            user finishes the maze, """
-        self._did_level_up = False
-        old_pos = self._player.get_position()
-        position = row, col = old_pos[0] + delta[0], old_pos[1] + delta[1]
-        max_row, max_col = self.get_level().get_dimensions()
-
-        # Check if player has escaped the maze
-        if (row < 0 or row >= max_row or col < 0 or col >= max_col) and \
-            isinstance(self.get_current_maze().get_tile(old_pos), Door):
-            self.level_up()
-
-        # Move player if tile is non-blocking and update stats
-        else:
-            tile = self.get_current_maze().get_tile(position)
-            if not tile.is_blocking():
-                self._num_moves += 1
+            user finishes the maze. Subscribers are sent the move's events
+            together.
+        """
+        with self.batch_events():
+            self._did_level_up = False
+            self._changed_cells = set()
+            old_pos = self._player.get_position()
+            row, col = old_pos[0] + delta[0], old_pos[1] + delta[1]
+            position = (row, col)
+            max_row, max_col = self.get_level().get_dimensions()
+
+            # Check if player has escaped the maze; they can only leave by a
+            # door
+            if row < 0 or row >= max_row or col < 0 or col >= max_col:
+                maze = self.get_current_maze()
+                if isinstance(maze.get_tile(old_pos), Door):
+                    self.level_up()
+
+            # Move player if tile is non-blocking and update stats
+            else:
+                tile = self.get_current_maze().get_tile(position)
+                if not tile.is_blocking():
+                    self._num_moves += 1
         
-                if self._num_moves % 5 == 0:
-                    self._player.change_hunger(1)
-                    self._player.change_thirst(1)
-                self._player.change_health(-1 - tile.damage())
+                    if self._subscribers:
+                        old_stats = self.get_player_stats()
+                    if self._num_moves % 5 == 0:
+                        self._player.change_hunger(1)
+                        self._player.change_thirst(1)
+                    self._player.change_health(-1 - tile.damage())
+
+                    self._player.set_position(position)
+                    self._changed_cells.update((old_pos, position))
+                    if self._subscribers:
+                        self._publish_move(old_pos, old_stats)
+                    self.attempt_collect_item(position)
+
+    def _publish_move(self, old_position: tuple[int, int],
+                      old_stats: tuple[int, int, int]) -> None:
+        """ Publishes what changed when the player stepped to a new cell.
 
-                self._player.set_position(position)
-                self.attempt_collect_item(position)
+        Parameters:
+            old_position: Where the player was before the move
+            old_stats: The player's (HP, hunger, thirst) before the move
+        """
+        self._publish(PlayerMoved(old_position, self._player.get_position(),
+                                  self._num_moves))
+        stats = self.get_player_stats()
+        if stats == old_stats:
+            return
+        self._publish(StatsChanged(*stats))
+        health, hunger, thirst = old_stats
+        lost_before = health <= 0 or hunger >= MAX_HUNGER \
+            or thirst >= MAX_THIRST
+        if self.has_lost() and not lost_before:
+            self._publish(Lost())
     
     def attempt_collect_item(self, position: tuple[int, int]) -> None:
         """ Collect the item at the given position if one exists. Unlock door if
@@ -603,7 +1124,32 @@ class Model:
         if item is not None:
             self._player.add_item(item)
             self.get_level().remove_item(position)
-        self.get_level().attempt_unlock_door()
+            self._changed_cells.add(position)
+            if self._subscribers:
+                self._publish(ItemCollected(position, item.get_id()))
+        unlocked = self.get_level().attempt_unlock_door()
+        self._changed_cells.update(unlocked)
+        if unlocked and self._subscribers:
+            self._publish(DoorsUnlocked(unlocked))
+
+    def use_item(self, item_name: str) -> Optional[Item]:
+        """ Takes one item with the given name from the player's inventory and
+            applies it to the player.
+
+        Parameters:
+            item_name: The name of the item to use.
+
+        Returns:
+            The item used, or None if the player has no item with that name.
+        """
+        item = self._player.get_inventory().remove_item(item_name)
+        if item is None:
+            return None
+        old_stats = self.get_player_stats()
+        item.apply(self._player)
+        if self._subscribers and self.get_player_stats() != old_stats:
+            self._publish(StatsChanged(*self.get_player_stats()))
+        return item
         
     def get_player(self) -> Player:
         """ Returns the player in the game. """
@@ -627,6 +1173,99 @@ class Model:
             positions in the current maze. """
         return self.get_level().get_items()
 
+    def get_state(self) -> dict:
+        """ Returns a JSON-serialisable snapshot of the game, from which
+            from_state can rebuild it. Takes time proportional to the size of
+            the current maze.
+        """
+        level, player = self.get_level(), self._player
+        maze = level.get_maze()
+        num_cols = level.get_dimensions()[1]
+        layout = str(maze.get_layout(), 'ascii')
+        inventory = self.get_player_inventory().get_items()
+        return {
+            'game_file': self._game_file,
+            'level_num': self._level_num,
+            'dimensions': list(level.get_dimensions()),
+            'tiles': '\n'.join(
+                layout[start:start + num_cols]
+                for start in range(0, len(layout), num_cols)
+            ),
+            'doors_unlocked': not maze.is_locked(),
+            'items': [
+                [row, col, item.get_id()]
+                for (row, col), item in level.get_items().items()
+            ],
+            'player_start': list(level.get_player_start()),
+            'player_position': list(player.get_position()),
+            'player_stats': list(self.get_player_stats()),
+            'inventory': [
+                [item.get_id(), *(item.get_position() or (None, None))]
+                for items in inventory.values() for item in items
+            ],
+            'num_moves': self._num_moves,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict,
+                   levels: Optional[Iterable[Level]] = None) -> Model:
+        """ Rebuilds a game from a snapshot made by get_state. The current
+            level comes from the snapshot; later levels are read from the
+            snapshot's game file as usual.
+
+        Parameters:
+            state: The snapshot to restore
+            levels: The levels of the game file, if already loaded by other
+                    means (see __init__).
+
+        Raises:
+            ValueError: If the snapshot's maze does not match its dimensions,
+                        or a position in it is off the maze.
+        """
+        num_rows, num_cols = dimensions = tuple(state['dimensions'])
+        if num_rows < 1 or num_cols < 1:
+            raise ValueError(f"Snapshot has dimensions {dimensions}")
+        rows = state['tiles'].split('\n')
+        if len(rows) != num_rows:
+            raise ValueError(f"Snapshot has {len(rows)} rows of tiles but its "
+                             f"dimensions have {num_rows}")
+        positions = [('player start', state['player_start']),
+                     ('player position', state['player_position'])]
+        positions.extend(('item', (row, col))
+                         for row, col, _ in state['items'])
+        for name, (row, col) in positions:
+            if not (0 <= row < num_rows and 0 <= col < num_cols):
+                raise ValueError(f"Snapshot {name} {(row, col)} is off the "
+                                 f"{num_rows}x{num_cols} maze")
+
+        model = cls(state['game_file'], levels)
+        for _ in range(state['level_num']):
+            if next(model._levels, None) is None:
+                raise ValueError(
+                    f"{state['game_file']} has no level {state['level_num']}")
+        model._level_num = state['level_num']
+
+        level = Level(dimensions)
+        for row in rows:
+            level.get_maze().add_row(row)
+        for row, col, item_id in state['items']:
+            level.add_entity((row, col), item_id)
+        level.add_player_start(tuple(state['player_start']))
+        if state['doors_unlocked']:
+            level.get_maze().unlock_door()
+        model._level = level
+
+        health, hunger, thirst = state['player_stats']
+        model._player = Player(tuple(state['player_position']))
+        model._player.change_health(health - MAX_HEALTH)
+        model._player.change_hunger(hunger)
+        model._player.change_thirst(thirst)
+        for item_id, row, col in state['inventory']:
+            position = None if row is None else (row, col)
+            model._player.add_item(Level.create_item(position, item_id))
+        model._num_moves = state['num_moves']
+        return model
+
     def __str__(self):
         return f"Model('{self._game_file}')"
     
@@ -636,15 +1275,36 @@ class Model:
 
 class MazeRunner:
     """ Controller class for a game of MazeRunner """
-    def __init__(self, game_file: str, view: UserInterface) -> None:
+    def __init__(self, game_file: str, view: UserInterface,
+                 recorder: Optional['InputRecorder'] = None) -> None:
         """ Sets up initial game state
         
         Parameters:
             game_file: Path to the file from which the game levels are loaded
             view: A subclass of Interface to manage the display of information
+            recorder: Records every accepted input, if given (see recording.py)
         """
         self._model = Model(game_file)
         self._view = view
+        self._recorder = recorder
+
+    def _record_move(self, move: str) -> None:
+        """ Records a move the model has just made, and any level up it caused.
+
+        Parameters:
+            move: The move key
+        """
+        if self._recorder is None:
+            return
+        self._recorder.record_move(move)
+        if self._model.did_level_up():
+            self._recorder.record_level_up(self._model.get_level_num())
+
+    def close(self) -> None:
+        """ Releases the game file and closes the recorder, if any. """
+        self._model.close()
+        if self._recorder is not None:
+            self._recorder.close()
 
     def _redraw(self) -> None:
         """ Redraws the entire view based on the current model state. """
@@ -672,16 +1332,17 @@ class MazeRunner:
         # Player has attempted to move
         if move in (UP, DOWN, LEFT, RIGHT):
             self._model.move_player(MOVE_DELTAS.get(move))
+            self._record_move(move)
         
         # Player has attempted to use an item
         elif len(move) > 1 and move.split()[0] == 'i':
             item_name = move.partition(' ')[-1]
-            item = self._model.get_player().get_inventory().remove_item(item_name)
+            item = self._model.use_item(item_name)
             print(item)
-            if item is not None:
-                item.apply(self._model.get_player())
-            else:
+            if item is None:
                 print('\nNo item with that name!\n')
+            elif self._recorder is not None:
+                self._recorder.record_item(item_name)
     
         # Invalid; reprompt
         else:
@@ -699,12 +1360,20 @@ class MazeRunner:
             elif self._model.has_lost():
                 print(LOSS_MESSAGE)
                 break
+            elif self._model.get_error() is not None:
+                print(f'{LEVEL_ERROR_MESSAGE} {self._model.get_error()}')
+                break
+        self.close()
 
 def main():
     """ Entry-point to gameplay """
     view = TextInterface()
     game_file = input('Enter game file: ')
-    maze_runner = MazeRunner(game_file, view)
+    recorder = None
+    if RECORDING_FILE is not None:
+        from recording import InputRecorder
+        recorder = InputRecorder(RECORDING_FILE, game_file)
+    maze_runner = MazeRunner(game_file, view, recorder)
     maze_runner.play()
 
 if __name__ == '__main__':
@@ -1,5 +1,12 @@
+import sys
+
 from constants import PLAYER
 
+# ANSI escape codes used to redraw in place
+CLEAR_SCREEN = '\x1b[H\x1b[2J'
+CLEAR_LINE = '\x1b[2K'
+CLEAR_BELOW = '\x1b[J'
+
 class UserInterface:
     """ Abstract class providing an interface for any MazeRunner View class. """
     def draw(
@@ -55,29 +62,92 @@ class UserInterface:
         raise NotImplementedError
 
 class TextInterface(UserInterface):
-    """ A MazeRunner interface that uses ascii to present information. """
+    """ A MazeRunner interface that uses ascii to present information.
+
+        Each call to draw writes the whole frame with a single write. In
+        in-place mode the frame is kept at the top of the terminal and only
+        the lines that changed since the last draw are rewritten, using ANSI
+        cursor movement.
+    """
+    def __init__(self, in_place: bool = False) -> None:
+        """ Sets up the interface.
+
+        Parameters:
+            in_place: Whether to redraw over the previous frame rather than
+                      below it. Needs a terminal that understands ANSI codes.
+        """
+        self._in_place = in_place
+        self._last_lines = None  # The lines of the last in-place frame
+
+    def draw(
+        self,
+        maze: 'Maze',
+        items: dict[tuple[int, int], 'Item'],
+        player_position: tuple[int, int],
+        inventory: 'Inventory',
+        player_stats: tuple[int, int, int]
+    ) -> None:
+        frame = (self._level_text(maze, items, player_position)
+                 + self._inventory_text(inventory)
+                 + self._player_stats_text(player_stats))
+        if not self._in_place:
+            sys.stdout.write(frame)
+            return
+
+        lines = frame.split('\n')
+        if self._last_lines is None:
+            # Start from a clear screen with the cursor at the top left
+            output = [CLEAR_SCREEN, frame]
+        else:
+            output = []
+            for line_num, line in enumerate(lines):
+                if line_num >= len(self._last_lines) \
+                        or line != self._last_lines[line_num]:
+                    output.append(f'\x1b[{line_num + 1};1H{CLEAR_LINE}{line}')
+            # Park the cursor below the frame and wipe any old prompts there
+            output.append(f'\x1b[{len(lines)};1H{CLEAR_BELOW}')
+        self._last_lines = lines
+        sys.stdout.write(''.join(output))
+
+    def _level_text(
+        self,
+        maze: 'Maze',
+        items: dict[tuple[int, int], 'Item'],
+        player_position: tuple[int, int]
+    ) -> str:
+        """ Returns the maze as text, one line per row, with the items and
+            the player shown over their tiles.
+        """
+        num_cols = maze.get_dimensions()[1]
+        frame = bytearray(str(maze) + '\n', 'ascii')
+        # Each row takes num_cols characters plus a newline
+        for (row, col), item in items.items():
+            frame[row * (num_cols + 1) + col] = ord(item.get_id())
+        row, col = player_position
+        frame[row * (num_cols + 1) + col] = ord(PLAYER)
+        return frame.decode('ascii')
+
+    def _inventory_text(self, inventory: 'Inventory') -> str:
+        """ Returns the inventory as text. """
+        text = str(inventory) if inventory.get_counts() else 'Empty'
+        return '---------------\nInventory\n' + text + '\n' \
+            + '---------------\n'
+
+    def _player_stats_text(self, player_stats: tuple[int, int, int]) -> str:
+        """ Returns the player's stats as text. """
+        hp, hunger, thirst = player_stats
+        return f'HP: {hp}\nhunger: {hunger}\nthirst: {thirst}\n'
+
     def _draw_level(
         self,
         maze: 'Maze',
         items: dict[tuple[int, int], 'Item'],
         player_position: tuple[int, int]
     ) -> None:
-        num_rows, num_cols = maze.get_dimensions()
-        for row in range(num_rows):
-            row_str = ''
-            for col in range(num_cols):
-                if (row, col) == player_position:
-                    row_str += PLAYER
-                elif (row, col) in items:
-                    row_str += items.get((row, col)).get_id()
-                else:
-                    row_str += maze.get_tile((row, col)).get_id()
-            print(row_str)
+        sys.stdout.write(self._level_text(maze, items, player_position))
     
     def _draw_inventory(self, inventory: 'Inventory') -> None:
-        text = str(inventory) if inventory.get_items() != {} else 'Empty'
-        print('---------------\nInventory\n' + text + '\n' + '---------------')
+        sys.stdout.write(self._inventory_text(inventory))
     
     def _draw_player_stats(self, player_stats: tuple[int, int, int]) -> None:
-        hp, hunger, thirst = player_stats
-        print(f'HP: {hp}\nhunger: {hunger}\nthirst: {thirst}')
+        sys.stdout.write(self._player_stats_text(player_stats))
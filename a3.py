@@ -1,24 +1,111 @@
 from __future__ import annotations
+import json
+import time
 import tkinter as tk
+from typing import Callable, Iterable, Optional, Union
 from tkinter import messagebox
 from tkinter import filedialog
 from a3_support import AbstractGrid
-from constants import GAME_FILE, TASK
+from constants import GAME_FILE, RECORDING_FILE, TASK
 from a2_solution import *
+from level_pack import LevelPack, pack_levels
 from PIL import Image, ImageTk
 
+SAVE_VERSION = 1
+
 
 class LevelView(AbstractGrid):
-    """ A view class that displays the maps along with its entities. """
-    def __init__ (self, master, dimensions, size, **kwargs):
+    """ A view class that displays the maps along with its entities.
+
+        Mazes wider or taller than the viewport are shown through a window of
+        viewport x viewport cells of a fixed size that follows the player.
+        Only the cells in the window have canvas items; scrolling moves them
+        and draws just the cells that come into view.
+    """
+    def __init__ (self, master, dimensions, size,
+                  viewport: Optional[int] = None, **kwargs):
         """ Initialises certain elements in LevelView
 
         Parameters:
             dimensions: The # of rows and columns
             size: The pixel size of the maze
+            viewport: The most cells to show along each side, or None to
+                      always fit the whole maze
             **kwargs: Arguments to be added for the canvas
         """
+        self._viewport = viewport
         super().__init__(master, dimensions, size, **kwargs)
+        self._tile_items = {}  # Maps positions to the canvas item of the tile
+        self._entity_items = {}  # Maps positions to the canvas items of entities
+
+    def set_dimensions(self, dimensions: tuple[int, int]) -> None:
+        """ Sets the dimensions of the maze, and whether it is shown through
+            a scrolling window.
+
+        Parameters:
+            dimensions: (#rows, #columns)
+        """
+        super().set_dimensions(dimensions)
+        rows, cols = dimensions
+        viewport = self._viewport
+        if viewport is None or (rows <= viewport and cols <= viewport):
+            self._window = None
+        else:
+            self._window = (min(rows, viewport), min(cols, viewport))
+        self._origin = (0, 0)  # The top-left cell shown
+
+    def get_cell_size(self) -> tuple[int, int]:
+        """ Returns the size of the cells (width, height) in pixels, which is
+            fixed by the viewport when scrolling.
+        """
+        if self._window is None:
+            return super().get_cell_size()
+        width, height = self._size
+        return width // self._viewport, height // self._viewport
+
+    def get_bbox(self, position: tuple[int, int]) -> tuple[int, int, int, int]:
+        """ Returns the bounding box of the cell at position on the canvas.
+
+        Parameters:
+            position: The (row, col) position of the cell in the maze
+        """
+        origin_row, origin_col = self._origin
+        return super().get_bbox((position[0] - origin_row,
+                                 position[1] - origin_col))
+
+    def get_midpoint(self, position: tuple[int, int]) -> tuple[int, int]:
+        """ Returns the centre of the cell at position on the canvas.
+
+        Parameters:
+            position: The (row, col) position of the cell in the maze
+        """
+        origin_row, origin_col = self._origin
+        return super().get_midpoint((position[0] - origin_row,
+                                     position[1] - origin_col))
+
+    def draw_maze(self, maze: Maze, items: dict[tuple[int, int], Item],
+                  player_pos: tuple[int, int]) -> None:
+        """ Clears everything and draws the maze with its entities. When
+            scrolling, only the window around the player is drawn.
+
+        Parameters:
+            maze: The maze to display
+            items: All the items on the maze
+            player_pos: The position of the player entity
+        """
+        if self._window is None:
+            self.draw(maze.get_tiles(), items, player_pos)
+            return
+
+        self.clear()
+        self._tile_items = {}
+        self._entity_items = {}
+        window_rows, window_cols = self._window
+        self._origin = (
+            self._follow(player_pos[0], window_rows // 2, window_rows, 0),
+            self._follow(player_pos[1], window_cols // 2, window_cols, 1),
+        )
+        self._draw_cells(maze, items, player_pos, self._window_cells())
         
     def draw(self, tiles: list[list[Tile]], items: dict[tuple[int, int], item],
              player_pos: tuple[int, int]) -> None:
@@ -30,26 +117,137 @@ class LevelView(AbstractGrid):
             player_pos: The position of the player entity
         """
         self.clear()
-        items[player_pos] = Player(player_pos)
+        self._tile_items = {}
+        self._entity_items = {}
 
         for row_number, row in enumerate(tiles):
             for tile_number, tile in enumerate(row):
-                
-                # Adds cells to LevelView
-                cell_position = (row_number, tile_number)
-                x_min, y_min, x_max, y_max = self.get_bbox(cell_position)
-                self.create_rectangle(x_min, y_min, x_max, y_max,
-                                      fill=TILE_COLOURS[tile.get_id()])
-
-                # Adds entities to specific cells
-                for item_position in items:
-                    if item_position == cell_position:
-                        entity = items[item_position]
-                        self.create_oval(x_min, y_min, x_max, y_max,
-                                         fill=ENTITY_COLOURS[entity.get_id()])
-                        self.annotate_position((cell_position), entity.get_id())
-
-        del items[player_pos]
+                self._draw_tile((row_number, tile_number), tile)
+
+        # Entities go on top of the tiles, with the player hiding any item
+        for item_position, item in items.items():
+            if item_position != player_pos:
+                self._draw_entity(item_position, item.get_id())
+        self._draw_entity(player_pos, PLAYER)
+
+    def redraw_cells(self, maze: Maze, items: dict[tuple[int, int], Item],
+                     player_pos: tuple[int, int],
+                     positions: Iterable[tuple[int, int]]) -> None:
+        """ Redraws only the given cells, reusing the canvas items of their
+            tiles. Must be called after draw for the same maze.
+
+        Parameters:
+            maze: The maze being displayed
+            items: All the items on the maze
+            player_pos: The position of the player entity
+            positions: The (row, col) positions of the cells that changed
+        """
+        if self._window is not None:
+            self._scroll(maze, items, player_pos)
+            visible = self._window_cells()
+            positions = [position for position in positions
+                         if position in visible]
+        for position in positions:
+            self._draw_tile(position, maze.get_tile(position))
+            self.delete(*self._entity_items.pop(position, ()))
+            if position == player_pos:
+                self._draw_entity(position, PLAYER)
+            elif position in items:
+                self._draw_entity(position, items[position].get_id())
+
+    def _window_cells(self) -> set[tuple[int, int]]:
+        """ Returns the positions of the cells in the scrolling window. """
+        (origin_row, origin_col), (window_rows, window_cols) = \
+            self._origin, self._window
+        return {(row, col)
+                for row in range(origin_row, origin_row + window_rows)
+                for col in range(origin_col, origin_col + window_cols)}
+
+    def _follow(self, position: int, margin: int, window: int,
+                axis: int) -> int:
+        """ Returns where the window should start along one axis to keep
+            position at least margin cells from its edges, within the maze.
+
+        Parameters:
+            position: The player's row or column
+            margin: The number of cells to keep between player and edge
+            window: The number of cells the window shows along this axis
+            axis: 0 for rows, 1 for columns
+        """
+        start = self._origin[axis]
+        if position < start + margin:
+            start = position - margin
+        elif position > start + window - 1 - margin:
+            start = position - (window - 1 - margin)
+        return max(0, min(start, self._dimensions[axis] - window))
+
+    def _scroll(self, maze: Maze, items: dict[tuple[int, int], Item],
+                player_pos: tuple[int, int]) -> None:
+        """ Scrolls the window if the player is near its edge, moving the
+            canvas items of cells still in view and drawing those coming in.
+        """
+        window_rows, window_cols = self._window
+        origin = (
+            self._follow(player_pos[0], window_rows // 4, window_rows, 0),
+            self._follow(player_pos[1], window_cols // 4, window_cols, 1),
+        )
+        if origin == self._origin:
+            return
+
+        old_cells = self._window_cells()
+        cell_width, cell_height = self.get_cell_size()
+        self.move('all', (self._origin[1] - origin[1]) * cell_width,
+                  (self._origin[0] - origin[0]) * cell_height)
+        self._origin = origin
+        new_cells = self._window_cells()
+        for position in old_cells - new_cells:
+            self.delete(self._tile_items.pop(position),
+                        *self._entity_items.pop(position, ()))
+        self._draw_cells(maze, items, player_pos, new_cells - old_cells)
+
+    def _draw_cells(self, maze: Maze, items: dict[tuple[int, int], Item],
+                    player_pos: tuple[int, int],
+                    positions: Iterable[tuple[int, int]]) -> None:
+        """ Draws the tiles and then the entities of cells with no canvas
+            items yet.
+        """
+        positions = sorted(positions)
+        for position in positions:
+            self._draw_tile(position, maze.get_tile(position))
+        for position in positions:
+            if position == player_pos:
+                self._draw_entity(position, PLAYER)
+            elif position in items:
+                self._draw_entity(position, items[position].get_id())
+
+    def _draw_tile(self, position: tuple[int, int], tile: Tile) -> None:
+        """ Draws the tile at position, updating its canvas item if one exists.
+
+        Parameters:
+            position: The (row, col) position of the tile
+            tile: The tile to draw
+        """
+        colour = TILE_COLOURS[tile.get_id()]
+        tile_item = self._tile_items.get(position)
+        if tile_item is None:
+            self._tile_items[position] = self.create_rectangle(
+                self.get_bbox(position), fill=colour)
+        else:
+            self.itemconfigure(tile_item, fill=colour)
+
+    def _draw_entity(self, position: tuple[int, int], entity_id: str) -> None:
+        """ Draws an entity on top of the tile at position.
+
+        Parameters:
+            position: The (row, col) position of the entity
+            entity_id: The ID of the entity to draw
+        """
+        self._entity_items[position] = (
+            self.create_oval(self.get_bbox(position),
+                             fill=ENTITY_COLOURS[entity_id]),
+            self.create_text(self.get_midpoint(position), text=entity_id,
+                             font=TEXT_FONT)
+        )
                 
         
 class StatsView(AbstractGrid):
@@ -65,6 +263,7 @@ class StatsView(AbstractGrid):
         stats_dimensions = (2, 4)
         super().__init__(master,  stats_dimensions, (width, STATS_HEIGHT),
                          **kwargs)
+        self._text_items = {}  # Maps cell positions to their text items
         
     def draw_stats(self, player_stats: tuple[int, int, int]) -> None:
         """ Creates a diagram to see the player's stats.
@@ -88,6 +287,21 @@ class StatsView(AbstractGrid):
         """
         self.annotate_position((0, 3), "Coins")
         self.annotate_position((1, 3), str(num_coins))
+
+    def annotate_position(self, position: tuple[int, int], text: str) -> None:
+        """ Annotates the cell at position, changing the text of its existing
+            annotation rather than drawing a new one.
+
+        Parameters:
+            position: The (row, col) cell position.
+            text: The text to draw.
+        """
+        text_item = self._text_items.get(position)
+        if text_item is None:
+            self._text_items[position] = self.create_text(
+                self.get_midpoint(position), text=text, font=TEXT_FONT)
+        else:
+            self.itemconfigure(text_item, text=text)
         
     
 class InventoryView(tk.Frame):
@@ -104,6 +318,7 @@ class InventoryView(tk.Frame):
         self._inventoryTitle = tk.Label(self, text="Inventory", font=HEADING_FONT)
         self._inventoryTitle.pack(anchor=tk.N)
         self._callback = None
+        self._item_labels = {}  # Maps item names to their labels
 
     def set_click_callback(self, callback: Callable[[str], None]) -> None:
         """ Takes in a string of whatever was clicked.
@@ -118,17 +333,24 @@ class InventoryView(tk.Frame):
         self.destroy()
         
     def draw_item(self, name: str, num: int, colour: str) -> None:
-        """ Creates and binds a label in inventory frame. 
+        """ Creates and binds a label in inventory frame, or updates the count
+            on the label if the item already has one.
 
         Parameters:
             name: String of the item
             num: Quantity of said item
             colour: Background colour of the label
         """
-        itemLabel = tk.Label(self, text=str(name) + ": " + str(num), bg=colour,
-                             font=TEXT_FONT)
+        text = str(name) + ": " + str(num)
+        itemLabel = self._item_labels.get(name)
+        if itemLabel is not None:
+            itemLabel.config(text=text)
+            return
+
+        itemLabel = tk.Label(self, text=text, bg=colour, font=TEXT_FONT)
         itemLabel.pack(fill=tk.X)
         itemLabel.bind("<Button-1>", lambda event: self._callback(name))
+        self._item_labels[name] = itemLabel
         
     def draw_inventory(self, inventory: Inventory) -> None:
         """ Draws the entire inventory.
@@ -136,13 +358,17 @@ class InventoryView(tk.Frame):
         Parameters:
             inventory: All the items in player's inventory
         """
+        counts = inventory.get_counts()
+        # Removes the labels of items that have run out
+        for item_name in list(self._item_labels):
+            if item_name not in counts:
+                self._item_labels.pop(item_name).destroy()
+
         #draws  all the items in inventory
-        for item_name in inventory.get_items():
+        for item_name, item_count in counts.items():
             if item_name != 'Coin':
-                entity_colour_key = inventory.get_items()[item_name]
-                item_count = len(entity_colour_key)
-                item_colour = ENTITY_COLOURS[entity_colour_key[0].get_id()]
-                self.draw_item(item_name, item_count, item_colour)
+                item_id = inventory.peek_item(item_name).get_id()
+                self.draw_item(item_name, item_count, ENTITY_COLOURS[item_id])
             
             
 class GraphicalInterface (UserInterface):
@@ -162,23 +388,26 @@ class GraphicalInterface (UserInterface):
         self._middleFrame.pack()
         self._statsFrame = tk.Frame(self._master)
         self._statsFrame.pack()
+        self._levelView = None
 
     def create_interface(self, dimensions: tuple[int, int]) -> None:
-        """ Creates all the widgets for the game
+        """ Creates all the widgets for the game the first time it is called.
+            Widgets are kept for the lifetime of the window, so later calls
+            only resize the level view for a new maze.
 
         Parameters:
             dimensions: # of rows and columns
         """
-        stats_width = 800
+        if self._levelView is not None:
+            self._levelView.set_dimensions(dimensions)
+            return
 
-        if TASK == 2:
-            self._imageLevelView = ImageLevelView(self._middleFrame, dimensions,
-                                                  (MAZE_WIDTH/1.5, MAZE_WIDTH/1.5))
-            self._imageLevelView.pack(side=tk.LEFT)
-        else:
-            self._levelView = LevelView(self._middleFrame, dimensions,
-                                        (MAZE_WIDTH/1.5, MAZE_WIDTH/1.5))
-            self._levelView.pack(side=tk.LEFT)
+        stats_width = 800
+        level_view = ImageLevelView if TASK == 2 else LevelView
+        self._levelView = level_view(self._middleFrame, dimensions,
+                                     (MAZE_WIDTH/1.5, MAZE_WIDTH/1.5),
+                                     viewport=VIEWPORT_CELLS)
+        self._levelView.pack(side=tk.LEFT)
 
         self._inventoryView = InventoryView(self._middleFrame,
                                             height=MAZE_HEIGHT,
@@ -187,15 +416,6 @@ class GraphicalInterface (UserInterface):
         self._statsView = StatsView(self._statsFrame, stats_width, bg=THEME_COLOUR)
         self._statsView.pack(anchor=tk.N)
 
-    def clear_all(self) -> None:
-        """ Clears all widgets off master. """
-        if TASK == 2:
-            self._imageLevelView.destroy()
-        else:
-            self._levelView.destroy()
-        self._statsView.destroy()
-        self._inventoryView.destroy()
-
     def set_maze_dimensions(self, dimensions: tuple[int, int]) -> None:
         """ Sets the dimensions to the new dimensions.
 
@@ -244,6 +464,26 @@ class GraphicalInterface (UserInterface):
         self._draw_player_stats(player_stats)
         self._draw_level(maze, items, player_position)
 
+    def draw_changes(self, maze: Maze, items: dict[tuple[int, int], Item],
+                     player_position: tuple[int, int], inventory: Inventory,
+                     player_stats: tuple[int, int, int],
+                     changed_cells: Iterable[tuple[int, int]]) -> None:
+        """ Redraws the inventory and stats, but only the changed cells of the
+            maze drawn by the last call to draw.
+
+        Parameters:
+            maze: the tiles of the maze
+            items: all the entities on the maze with their position
+            player_position: the (x,y) coordinates of the player
+            inventory: all the items in the player's inventory
+            player_stats: the number of hp, hunger and thirst they have.
+            changed_cells: the positions of the cells that need redrawing
+        """
+        self._draw_inventory(inventory)
+        self._draw_player_stats(player_stats)
+        self._levelView.redraw_cells(maze, items, player_position,
+                                     changed_cells)
+
     def _draw_inventory(self, inventory: Inventory) -> None:
         """ Draws inventory in the root window.
 
@@ -253,11 +493,7 @@ class GraphicalInterface (UserInterface):
         self._inventoryView.draw_inventory(inventory)
 
         # Draws the number of coins
-        coin_count = 0
-        coin = 'Coin'
-        if coin in inventory.get_items():
-            coin_count = len(inventory.get_items()[coin])
-        self._statsView.draw_coins(coin_count)
+        self._statsView.draw_coins(inventory.get_count('Coin'))
         
     def _draw_level(self, maze: Maze, items: dict[tuple[int, int], Item],
                     player_position: tuple[int, int]) -> None:
@@ -268,10 +504,7 @@ class GraphicalInterface (UserInterface):
             items: All the items on the maze
             player_position: The players position on the maze
         """
-        if TASK == 2:
-            self._imageLevelView.draw(maze.get_tiles(), items, player_position)
-        else:
-            self._levelView.draw(maze.get_tiles(), items, player_position)
+        self._levelView.draw_maze(maze, items, player_position)
 
     def _draw_player_stats(self, player_stats: tuple[int, int, int]) -> None:
         """ Draws all the current player stats for the game.
@@ -284,16 +517,24 @@ class GraphicalInterface (UserInterface):
 
 class GraphicalMazeRunner(MazeRunner):
     """ Overriding text interface to create a graphical version """
-    def __init__(self, game_file: str, root: tk.Tk) -> None:
+    def __init__(self, game_file: str, root: tk.Tk,
+                 recorder: Optional['InputRecorder'] = None) -> None:
         """ Creates a new graphical MazeRunner with a view.
 
         Parameters:
             game_file: The file of the game that will be run
             root: The window that will house GraphicalMazeRunner
+            recorder: Records every accepted input, if given
         """
-        super().__init__(game_file, UserInterface)
+        super().__init__(game_file, UserInterface, recorder)
+        self._game_file = game_file
+        self._pack = None  # The game file compiled to a level pack, once needed
         self._root = root
         self._graphicalInterface = GraphicalInterface(self._root)
+        self._graphicalInterface.create_interface(
+            self._model.get_level().get_dimensions())
+        self._graphicalInterface.bind_keypress(self._handle_keypress)
+        self._graphicalInterface.set_inventory_callback(self._apply_item)
 
         if TASK == 2:
             self._menubar = tk.Menu(self._root)
@@ -307,11 +548,6 @@ class GraphicalMazeRunner(MazeRunner):
             self._filemenu.add_separator()
             self._filemenu.add_command(label="Quit", command=self.quit_game)
 
-            self._items = {}
-            self._inventory = Inventory([])
-            self._player_stats = None
-            self._player_pos = None
-            self._dimensions = None
             self._filename = None
 
             self._controlsFrame = ControlsFrame(self._root)
@@ -319,180 +555,82 @@ class GraphicalMazeRunner(MazeRunner):
             self._controlsFrame.create_timer()
 
     def save_game(self):
-        """ Saves the game as a file. """
-        game_stats = (str(self._model.get_current_maze().get_tiles()) + "\n" +
-                      str(self._model.get_current_items()) + "\n" +
-                      str(self._model.get_player_inventory().get_items()) + "\n" +
-                      str(self._model.get_player_stats()) + "\n" +
-                      str(self._model.get_player().get_position()) + "\n" +
-                      str(self._model.get_level().get_dimensions()))
+        """ Saves the game as a JSON file. """
+        game_state = {
+            'version': SAVE_VERSION,
+            'model': self._model.get_state(),
+            'timer': self._controlsFrame.get_elapsed(),
+        }
 
         # Prompts the user to save a file with a name
-        self._filename = filedialog.asksaveasfile(defaultextension=".txt",
-                                                  filetypes=[("Text file",
-                                                              ".txt")])
+        self._filename = filedialog.asksaveasfile(defaultextension=".json",
+                                                  filetypes=[("Saved game",
+                                                              ".json")])
         if self._filename:
-            self._filename.write(game_stats)
-            self._filename.close()
+            with self._filename:
+                json.dump(game_state, self._filename)
     
     def load_game(self):
-        """ Loads the game from the text file selected. """
+        """ Loads the game from the saved game file selected. """
         # Prompts user to load in a saved game
-        self._filename = filedialog.askopenfilename()
-        if self._filename:
-            file = open(self._filename, 'r')
-            read = file.readlines()
-            tiles, items, inventory, player_stats, player_pos, dimensions = read
-
-            self.convert_items(items)
-            self.convert_inventory(inventory)
-            self.convert_player_stats(player_stats)
-            self.convert_player_pos(player_pos)
-            self.convert_dimensions(dimensions)
-            self.convert_tiles(tiles)
-
-            self._graphicalInterface.clear_all()
-            self._graphicalInterface.create_interface(self._dimensions)
-            self._graphicalInterface.bind_keypress(self._handle_keypress)
-            self._graphicalInterface.set_inventory_callback(self._apply_item)
-            self._graphicalInterface.draw(self._maze, self._items,
-                                          self._player_pos, self._inventory,
-                                          self._player_stats)
-
-    def convert_player_stats(self, player_stats: str):
-        """ Converts the player stats from the text file into
-            actual player stats.
-
-        Parameters:
-            player_stats: The player stats from the text file
-        """
-        # Removes all unnecessary string characters
-        player_stats = player_stats.strip('(')
-        player_stats = player_stats.strip(')\n')
-        player_stats = player_stats.split(', ')
-
-        health, hunger, thirst = player_stats
-        self._player_stats = (int(health), int(hunger), int(thirst))
-
-    def convert_dimensions(self, dimensions: str):
-        """ Converts the dimensions from the text_file to actual
-            integer dimensions.
-
-        Parameters:
-            dimensions: A string of the dimensions
-        """
-        dimensions = dimensions.strip('[')
-        self._dimensions = [int(dimensions[0]), int(dimensions[3])]
-        self._maze = Maze((int(dimensions[0]), int(dimensions[3])))
-
-    def convert_player_pos(self, player_pos: str):
-        """ Converts the string of player position into integer versions
-
-        Parameters:
-            player_pos: A string version of the player
-        """
-        player_pos = player_pos.strip('(')
-        self._player_pos = (int(player_pos[0]), int(player_pos[3]))
-
-    def convert_tiles(self, tiles: str):
-        """ Changes a string of tiles into a Maze class.
-
-        Parameters:
-            tiles: A string of all the tiles in the maze
-        """
-        string_converter = {
-            'Wall()': '#',
-            'Empty()': 'E',
-            'Lava()': 'L',
-            'Door()': 'D'
-        }
-
-        tiles = tiles.split('],')
-        for row in tiles:
-
-            # Removes unnecessary string characters
-            row = row.replace('[', '')
-            row = row.replace(']', '')
-            row = row.split(', ')
-            each_row = ''
-
-            # Adds each converted tile to a row
-            for tile in row:
-                tile = tile.strip('')
-                tile = tile.strip()
-                tile_class = string_converter[tile]
-                each_row += tile_class
-
-            self._maze.add_row(each_row)
-
-    def convert_items(self, items: str):
-        """ Converts each string item into an item class.
-
-        Parameters:
-            items: All the items on the maze
-        """
-        if '{}' not in items:
-            items = items.split('), ')
-            for item in items:
-                item = item.split(': ')[1]
-                entity_class, position = self.convert_to_class(item)
-                self._items[position] = entity_class
-
-    def convert_to_class(self, item) -> tuple[int, int]:
-        """ Converts each item string to its corresponding class.
-
-        Parameters:
-            item: Each item as a string form
-        """
-        string_converter = {
-            'Coin': Coin,
-            'Water': Water,
-            'Honey': Honey,
-            'Apple': Apple,
-            'Potion': Potion
-        }
-
-        item = item.split('((')
-        entity, position = item
-        entity = entity.strip()
-        position = position[0], position[3]
-        x_pos, y_pos = position
-        pos = (int(x_pos), int(y_pos))
-        entity_class = string_converter[entity](pos)
-        return entity_class, pos
-
-    def convert_inventory(self, inventory):
-        """ Adds each string item to an Inventory class.
-
-        Parameters:
-            inventory: A string of the items in inventory
-        """
-        if '{}' not in inventory:
-            inventory = inventory.split('], ')
-
-            # Removes all unnecessary string characters
-            for items in inventory:
-                colon_finder = items.find('[')
-                items = items[colon_finder:]
-                items = items.strip('[')
-                items = items.split('),')
-
-                # Adds each converted string item to an inventory class
-                for item in items:
-                    entity_class, pos =  self.convert_to_class(item)
-                    self._inventory.add_item(entity_class)
+        self._filename = filedialog.askopenfilename(filetypes=[("Saved game",
+                                                                ".json")])
+        if not self._filename:
+            return
+
+        try:
+            with open(self._filename, 'r') as file:
+                game_state = json.load(file)
+            if game_state.get('version') != SAVE_VERSION:
+                raise ValueError('unsupported saved game version '
+                                 f'{game_state.get("version")}')
+            state = game_state['model']
+            levels = None
+            if state.get('game_file') == self._game_file:
+                levels = self._get_levels()
+            model = Model.from_state(state, levels)
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            messagebox.showerror('Load game',
+                                 f'Could not load {self._filename}: {error}')
+            return
+
+        self._model.close()
+        self._model = model
+        if self._recorder is not None:
+            self._recorder.record_load(game_state['model'])
+        self._controlsFrame.set_elapsed(game_state['timer'])
+        self.play()
 
     def restart_game(self):
         """ Restarts the whole game, resetting it to the original game_file. """
+        try:
+            levels = self._get_levels()
+        except (OSError, GameFileError) as error:
+            messagebox.showerror('Restart game',
+                                 f'Could not restart {self._game_file}: '
+                                 f'{error}')
+            return
         self._controlsFrame.reset_timer()
-        self._model = Model(GAME_FILE)
-        self._graphicalInterface.clear_all()
+        self._model.close()
+        self._model = Model(self._game_file, levels)
+        if self._recorder is not None:
+            self._recorder.record_restart()
         self.play()
         
+    def _get_levels(self) -> LevelPack:
+        """ Returns the levels of the game file from a level pack, so that
+            restarting and loading do not parse the text file again. The pack
+            is compiled in memory the first time it is needed.
+        """
+        if self._pack is None:
+            self._pack = pack_levels(iter_levels(self._game_file))
+        return LevelPack(self._pack)
+
     def quit_game(self):
         ans = messagebox.askokcancel('Verify Exit',
                                      'Are you sure you want to quit?')
         if ans:
+            self._model.close()
             self._root.destroy()
 
     def _handle_keypress(self, e: tk.Event) -> None:
@@ -501,21 +639,28 @@ class GraphicalMazeRunner(MazeRunner):
         Parameters:
             e: whatever key the user has pressed
         """
-        self._graphicalInterface.clear_all()
-
-        # Player has attempted a move
-        if e.char in (UP, DOWN, LEFT, RIGHT):
-            self._model.move_player(MOVE_DELTAS.get(e.char))
+        # Only moves change what is displayed
+        if e.char not in (UP, DOWN, LEFT, RIGHT):
+            return
+        self._model.move_player(MOVE_DELTAS.get(e.char))
+        self._record_move(e.char)
 
         # Player has won a game
         if self._model.has_won():
             messagebox.showinfo('Exit Menu', WIN_MESSAGE)
             self._root.destroy()
-        else:
+        elif self._model.get_error() is not None:
+            messagebox.showerror('Exit Menu', f'{LEVEL_ERROR_MESSAGE} '
+                                              f'{self._model.get_error()}')
+            self._root.destroy()
+        elif self._model.did_level_up():
             self.play()
+        else:
+            self._draw_changes()
 
         # Player has lost the game
         if self._model.has_lost():
+            self._model.close()
             messagebox.showinfo('Exit Menu', LOSS_MESSAGE)    
             self._root.destroy()
         
@@ -525,17 +670,34 @@ class GraphicalMazeRunner(MazeRunner):
         Parameters:
             item_name: the string of the item clicked
         """
-        item = self._model.get_player().get_inventory().remove_item(item_name)
-        item.apply(self._model.get_player())
-        self._graphicalInterface.clear_all()
-        self.play()
+        if self._model.use_item(item_name) is not None \
+                and self._recorder is not None:
+            self._recorder.record_item(item_name)
+        self._draw_changes(())
+
+    def _draw_changes(self, changed_cells: Optional[Iterable[tuple[int, int]]]
+                      = None) -> None:
+        """ Redraws the stats, inventory and only the changed maze cells.
+
+        Parameters:
+            changed_cells: The cells to redraw, defaulting to the cells changed
+                           by the last move.
+        """
+        if changed_cells is None:
+            changed_cells = self._model.get_changed_cells()
+        self._graphicalInterface.draw_changes(
+            self._model.get_current_maze(),
+            self._model.get_current_items(),
+            self._model.get_player().get_position(),
+            self._model.get_player_inventory(),
+            self._model.get_player_stats(),
+            changed_cells
+        )
 
     def play(self) -> None:
-        """ Runs the whole game and creates all the widgets. """
+        """ Draws the whole game for the current level. """
         level_dimensions = self._model.get_level().get_dimensions()
         self._graphicalInterface.create_interface(level_dimensions)
-        self._graphicalInterface.bind_keypress(self._handle_keypress)
-        self._graphicalInterface.set_inventory_callback(self._apply_item)
         self._graphicalInterface.draw(self._model.get_current_maze(),
                                       self._model.get_current_items(),
                                       self._model.get_player().get_position(),
@@ -543,18 +705,64 @@ class GraphicalMazeRunner(MazeRunner):
                                       self._model.get_player_stats())
 
 
+class SpriteCache:
+    """ Hands out PhotoImages resized to the current cell size for one view.
+        Each image file is decoded once, however many caches use it.
+    """
+    # Maps the paths of image files to their decoded PIL images
+    _sources = {}
+
+    def __init__(self, directory: str = 'images/') -> None:
+        """ Sets up an empty cache for the images in directory.
+
+        Parameters:
+            directory: The folder that contains the image files
+        """
+        self._directory = directory
+        self._sprites = {}  # Maps (file name, width, height) to PhotoImages
+        self._cell_size = None
+
+    def get_sprite(self, file_name: str,
+                   cell_size: tuple[int, int]) -> ImageTk.PhotoImage:
+        """ Returns the PhotoImage for file_name at the given size. Sprites
+            for any other cell size are dropped once the size changes, so a
+            cache must only serve one view, which redraws every cell when its
+            cell size changes.
+
+        Parameters:
+            file_name: The name of the image file inside the directory
+            cell_size: The (width, height) of a cell in pixels
+        """
+        if cell_size != self._cell_size:
+            self._sprites.clear()
+            self._cell_size = cell_size
+
+        key = (file_name, *cell_size)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            path = self._directory + file_name
+            source = self._sources.get(path)
+            if source is None:
+                source = Image.open(path)
+                source.load()
+                self._sources[path] = source
+            sprite = ImageTk.PhotoImage(source.resize(cell_size))
+            self._sprites[key] = sprite
+        return sprite
+
+
 class ImageLevelView(LevelView):
     """ Extends LevelView by adding images instead of circles. """
     def __init__(self, master, dimensions, size, **kwargs):
         """ Initialises certain elements in ImageLevelView extending on elements
-            front LevelView. Keeps track of all the images.
+            front LevelView.
 
         Parameters:
             dimensions: The # of rows and columns
             size: The pixel size of the maze
         """
         super().__init__(master, dimensions, size, **kwargs)
-        self._image_storage = []
+        self._sprites = SpriteCache()
 
     def draw(self, tiles: list[list[Tile]], items: dict[tuple[int, int], item],
              player_pos: tuple[int, int]) -> None:
@@ -565,40 +773,46 @@ class ImageLevelView(LevelView):
             items: All the items on the maze
             player_pos: The position of the player entity
         """
-        self.clear()
-        items[player_pos] = Player(player_pos)
+        cell_width, cell_height = self.get_cell_size()
+        self._cell_size = (int(cell_width), int(cell_height))
+        super().draw(tiles, items, player_pos)
 
-        for y, row in enumerate(tiles):
-            for x, tile in enumerate(row):
+    def draw_maze(self, maze: Maze, items: dict[tuple[int, int], Item],
+                  player_pos: tuple[int, int]) -> None:
+        """ Clears everything and draws the maze with its entities as images.
 
-                # Adds cells to LevelView
-                cell_position = (y,x)
-                self._cell_width, self._cell_height = self.get_cell_size()
-                mid_point_pos = self.get_midpoint(cell_position)
-                self.opening_image(TILE_IMAGES, tile, mid_point_pos)
+        Parameters:
+            maze: The maze to display
+            items: All the items on the maze
+            player_pos: The position of the player entity
+        """
+        cell_width, cell_height = self.get_cell_size()
+        self._cell_size = (int(cell_width), int(cell_height))
+        super().draw_maze(maze, items, player_pos)
 
-                # Adds entities to specific cells
-                for item_position in items:
-                    if item_position == cell_position:
-                        self.opening_image(ENTITY_IMAGES, items[item_position],
-                                           mid_point_pos)
+    def _draw_tile(self, position: tuple[int, int], tile: Tile) -> None:
+        photo = self.opening_image(TILE_IMAGES, tile.get_id())
+        tile_item = self._tile_items.get(position)
+        if tile_item is None:
+            self._tile_items[position] = self.create_image(
+                self.get_midpoint(position), image=photo)
+        else:
+            self.itemconfigure(tile_item, image=photo)
 
-        del items[player_pos]
+    def _draw_entity(self, position: tuple[int, int], entity_id: str) -> None:
+        photo = self.opening_image(ENTITY_IMAGES, entity_id)
+        self._entity_items[position] = (
+            self.create_image(self.get_midpoint(position), image=photo),
+        )
 
-    def opening_image(self, IMAGES, cell_entities, mid_point_position):
-        """ Creates the images for LevelView.
+    def opening_image(self, IMAGES, image_id: str) -> ImageTk.PhotoImage:
+        """ Returns the cached image for a tile or entity at the cell size.
 
         Parameters:
             IMAGES: The dictionary that contains the image's filename
-            cell_entities: The key of the IMAGES dictionary
-            mid_point_position: The midpoint of the image
+            image_id: The ID of the tile or entity; a key of IMAGES
         """
-        file_name = 'images/' + IMAGES[cell_entities.get_id()]
-        image = Image.open(file_name).resize((int(self._cell_width),
-                                              int(self._cell_height)))
-        photo = ImageTk.PhotoImage(image)
-        self.create_image(mid_point_position, image=photo)
-        self._image_storage.append(photo)
+        return self._sprites.get_sprite(IMAGES[image_id], self._cell_size)
 
 
 class ControlsFrame(tk.Frame):
@@ -618,59 +832,74 @@ class ControlsFrame(tk.Frame):
         self._newGame.pack(side=tk.LEFT, expand=1)
         self._timerFrame = tk.Frame(self)
         self._timerFrame.pack(side=tk.RIGHT, expand=1)
-        self._minutes = 0
-        self._seconds = 0
-
-    def reset_timer(self):
-        """ Restarts the timers. """
-        self._seconds = 0
-        self._minutes = 0
-        self._minutes_seconds.config(text=str(self._minutes) + 'm '
-                                     + str(self._seconds) + 's')
-
-    def create_timer(self):
-        """ Responsible for creating the Timer. """
-        one_second = 1000
         self._timerLabel = tk.Label(self._timerFrame, text='Timer',
                                     font=TEXT_FONT)
         self._timerLabel.pack(side=tk.TOP, expand=1)
-        self._minutes_seconds = tk.Label(self._timerFrame, font=TEXT_FONT,
-                                         text=str(self._minutes) + 'm '
-                                         + str(self._seconds) + 's')
+        self._minutes_seconds = tk.Label(self._timerFrame, font=TEXT_FONT)
         self._minutes_seconds.pack(side=tk.BOTTOM)
-        self._master.after(one_second, self.change_seconds)
+        self._start_time = time.monotonic()
+        self._after_id = None
+
+    def reset_timer(self):
+        """ Restarts the timer from zero. """
+        self._start_time = time.monotonic()
+        self.change_seconds()
+
+    def create_timer(self):
+        """ Starts the timer from zero. """
+        self.reset_timer()
+
+    def get_elapsed(self) -> float:
+        """ Returns the number of seconds since the timer was started. """
+        return time.monotonic() - self._start_time
+
+    def set_elapsed(self, seconds: float):
+        """ Sets the timer as if it had been started the given time ago.
+
+        Parameters:
+            seconds: The time to show on the timer, in seconds.
+        """
+        self._start_time = time.monotonic() - seconds
+        self.change_seconds()
 
     def change_seconds(self):
-        """ Resets the seconds to zero once it has reached 60. """
-        increments = 1
-        max_seconds = 60
-        seconds_start = 0
-
-        self._seconds += increments
-        if self._seconds == max_seconds:
-            self._seconds = seconds_start
-            self._minutes += increments
-        self.clear_all()
-        self.create_timer()
-
-    def clear_all(self):
-        """ Destroys the entire timer. """
-        self._timerLabel.destroy()
-        self._minutes_seconds.destroy()
-
-def play_game(root: tk.Tk):
+        """ Shows the elapsed time and schedules the next update for when the
+            displayed second changes. Only one update is ever pending.
+        """
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+
+        elapsed = self.get_elapsed()
+        minutes, seconds = divmod(int(elapsed), 60)
+        self._minutes_seconds.config(text=f'{minutes}m {seconds}s')
+
+        one_second = 1000
+        delay = one_second - int(elapsed % 1 * one_second)
+        self._after_id = self.after(delay, self.change_seconds)
+
+def play_game(root: tk.Tk) -> GraphicalMazeRunner:
     """ Instantiates GraphicalMazeRunner and inserts the game file with window.
 
     Parameters:
         root: The window the entire game will be played on
+
+    Returns:
+        The running game, to be closed once the window is
     """
-    GraphicalMazeRunner(GAME_FILE, root).play()
+    recorder = None
+    if RECORDING_FILE is not None:
+        from recording import InputRecorder
+        recorder = InputRecorder(RECORDING_FILE, GAME_FILE)
+    maze_runner = GraphicalMazeRunner(GAME_FILE, root, recorder)
+    maze_runner.play()
+    return maze_runner
 
 def main():
     """ Runs the whole game. """
     root = tk.Tk()
     app = play_game(root)
     root.mainloop()
+    app.close()
 
 if __name__ == '__main__':
     main()
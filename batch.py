@@ -0,0 +1,319 @@
+""" Runs many games headlessly across a pool of worker processes and reports
+    aggregate results for each game file.
+
+Example:
+    python batch.py games/*.txt --scripts sessions.txt --policy random \
+        --episodes 1000 --workers 8 --json results.json
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, NamedTuple, Optional
+
+from a2_solution import Model, iter_levels
+from constants import MOVE_DELTAS
+from level_pack import LevelPack, pack_levels
+from simulation import simulate
+from solver import solve_level
+
+# Level packs for each game file, set up once in every worker process
+_packs: dict[str, LevelPack] = {}
+# The solver's moves for each level pack, found once in every worker process
+_solver_moves: dict[LevelPack, str] = {}
+
+
+def random_policy(model: Model, levels: LevelPack, rng: random.Random,
+                  max_moves: int) -> str:
+    """ Returns uniformly random moves.
+
+    Parameters:
+        model: The game about to be played
+        levels: The levels of the game
+        rng: The random number generator for this episode
+        max_moves: The number of moves to return
+    """
+    return ''.join(rng.choices(tuple(MOVE_DELTAS), k=max_moves))
+
+
+def solver_policy(model: Model, levels: LevelPack, rng: random.Random,
+                  max_moves: int) -> str:
+    """ Returns the shortest route through each level in turn (see
+        solver.solve_level), up to the first level without one. Routes use
+        no items, so the player may starve on the way. Every episode plays
+        the same moves.
+
+    Parameters:
+        model: The game about to be played
+        levels: The levels of the game
+        rng: The random number generator for this episode
+        max_moves: The most moves to return
+    """
+    moves = _solver_moves.get(levels)
+    if moves is None:
+        routes = []
+        for level in levels:
+            route = solve_level(level)
+            if route is None:
+                break
+            routes.append(route.moves)
+        moves = _solver_moves[levels] = ''.join(routes)
+    return moves[:max_moves]
+
+
+# Maps policy names to functions returning the moves to play in a game
+POLICIES: dict[str, Callable[[Model, LevelPack, random.Random, int], str]] = {
+    'random': random_policy,
+    'solver': solver_policy,
+}
+
+
+class Task(NamedTuple):
+    """ One game to play: either a fixed move script or a policy episode. """
+    game_file: str
+    label: str  # Where the moves came from, e.g. 'moves.txt:3' or 'random#7'
+    moves: Optional[str] = None  # The move script, if not using a policy
+    policy: Optional[str] = None
+    seed: int = 0
+    max_moves: int = 0
+
+
+class TaskResult(NamedTuple):
+    """ The outcome of one task. """
+    game_file: str
+    label: str
+    won: bool
+    lost: bool
+    moves: int
+    stats: tuple[int, int, int]  # Final (HP, hunger, thirst)
+    level_seconds: list[float]  # Time spent on each level reached
+    level_moves: list[int]  # Moves made on each level reached
+    error: Optional[str] = None  # Why the next level could not be read, if
+                                 # that stopped the game
+
+
+def _find_bad_move(moves: str) -> Optional[int]:
+    """ Returns the index of the first character of moves that is not a move
+        key, or None if they all are.
+    """
+    for index, char in enumerate(moves):
+        if char not in MOVE_DELTAS:
+            return index
+    return None
+
+
+def _init_worker(packs: dict[str, bytes]) -> None:
+    """ Loads the level packs built by the parent into this worker.
+
+    Parameters:
+        packs: Maps game files to the bytes of their level packs
+    """
+    _packs.clear()
+    _packs.update({game_file: LevelPack(pack) for game_file, pack
+                   in packs.items()})
+
+
+def run_task(task: Task) -> TaskResult:
+    """ Plays one task to completion using the cached levels of its game.
+
+    Parameters:
+        task: The game and moves to play
+    """
+    model = Model(task.game_file, _packs[task.game_file])
+    moves = task.moves
+    if moves is None:
+        rng = random.Random(task.seed)
+        moves = POLICIES[task.policy](model, _packs[task.game_file], rng,
+                                      task.max_moves)
+    moves = moves.encode('ascii')
+
+    level_seconds, level_moves, offset = [], [], 0
+    while True:
+        start = time.perf_counter()
+        result = simulate(model, moves[offset:], record_events=False,
+                          stop_at_level_up=True)
+        level_seconds.append(time.perf_counter() - start)
+        level_moves.append(result.moves_applied)
+        offset += result.moves_applied
+        if model.has_won() or model.has_lost() or offset >= len(moves) \
+                or not model.did_level_up():
+            break
+
+    error = None if result.error is None else str(result.error)
+    return TaskResult(task.game_file, task.label, model.has_won(),
+                      model.has_lost(), offset, model.get_player_stats(),
+                      level_seconds, level_moves, error)
+
+
+def run_batch(tasks: list[Task], workers: Optional[int] = None
+              ) -> list[TaskResult]:
+    """ Runs the tasks across a pool of processes. Each game file is parsed
+        once here and handed to the workers as a level pack.
+
+    Parameters:
+        tasks: The tasks to run
+        workers: The number of worker processes; defaults to the CPU count
+
+    Raises:
+        ValueError: If a task's move script contains something other than a
+            move key. Scripts are all checked before any task runs, since an
+            error in a worker would stop the whole batch.
+    """
+    for task in tasks:
+        if task.moves is not None:
+            index = _find_bad_move(task.moves)
+            if index is not None:
+                raise ValueError(f"{task.label}: move {index} "
+                                 f"({task.moves[index]!r}) is not a move key")
+    packs = {
+        game_file: pack_levels(iter_levels(game_file))
+        for game_file in dict.fromkeys(task.game_file for task in tasks)
+    }
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(packs,)) as executor:
+        return list(executor.map(run_task, tasks, chunksize=chunksize))
+
+
+def summarise(results: list[TaskResult]) -> dict[str, dict]:
+    """ Aggregates results for each game file.
+
+    Parameters:
+        results: The results of every task
+
+    Returns:
+        Maps game files to their episode count, win rate, loss rate, number
+        of games stopped by a level that could not be read, mean moves, mean
+        final stats, and mean moves and seconds spent on each level.
+    """
+    by_game = {}
+    for result in results:
+        by_game.setdefault(result.game_file, []).append(result)
+
+    summary = {}
+    for game_file, game_results in by_game.items():
+        count = len(game_results)
+        num_levels = max(len(result.level_moves) for result in game_results)
+        per_level = []
+        for level in range(num_levels):
+            reached = [result for result in game_results
+                       if len(result.level_moves) > level]
+            per_level.append({
+                'episodes': len(reached),
+                'mean_moves': sum(result.level_moves[level]
+                                  for result in reached) / len(reached),
+                'mean_seconds': sum(result.level_seconds[level]
+                                    for result in reached) / len(reached),
+            })
+        summary[game_file] = {
+            'episodes': count,
+            'win_rate': sum(result.won for result in game_results) / count,
+            'loss_rate': sum(result.lost for result in game_results) / count,
+            'errors': sum(result.error is not None
+                          for result in game_results),
+            'mean_moves': sum(result.moves for result in game_results) / count,
+            'mean_hp': sum(result.stats[0] for result in game_results) / count,
+            'mean_hunger': sum(result.stats[1]
+                               for result in game_results) / count,
+            'mean_thirst': sum(result.stats[2]
+                               for result in game_results) / count,
+            'levels': per_level,
+        }
+    return summary
+
+
+def read_scripts(script_file: str) -> list[tuple[str, str]]:
+    """ Reads move scripts from a file with one script per line.
+
+    Parameters:
+        script_file: The path to the file of scripts
+
+    Returns:
+        (label, moves) pairs for each non-empty line.
+
+    Raises:
+        ValueError: If a line contains something other than move keys and
+            whitespace.
+    """
+    scripts = []
+    with open(script_file, 'r', encoding='utf-8',
+              errors='replace') as file:
+        for line_num, line in enumerate(file, start=1):
+            moves = ''.join(line.split())
+            index = _find_bad_move(moves)
+            if index is not None:
+                col_num = line.index(moves[index]) + 1
+                raise ValueError(f"{script_file}:{line_num}:{col_num}: "
+                                 f"{moves[index]!r} is not a move key")
+            if moves:
+                scripts.append((f'{script_file}:{line_num}', moves))
+    return scripts
+
+
+def main():
+    """ Runs a batch described on the command line and prints a summary. """
+    parser = argparse.ArgumentParser(description='Run MazeRunner games in '
+                                     'parallel and summarise the results.')
+    parser.add_argument('games', nargs='+', help='game files to play')
+    parser.add_argument('--scripts', nargs='*', default=[],
+                        help='files of move scripts, one script per line')
+    parser.add_argument('--policy', choices=sorted(POLICIES),
+                        help='policy to generate moves with')
+    parser.add_argument('--episodes', type=int, default=100,
+                        help='episodes per game for the policy')
+    parser.add_argument('--max-moves', type=int, default=1000,
+                        help='moves per policy episode')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed of the first policy episode')
+    parser.add_argument('--workers', type=int, help='number of processes')
+    parser.add_argument('--json', help='also write the summary to this file')
+    args = parser.parse_args()
+
+    try:
+        scripts = [script for script_file in args.scripts
+                   for script in read_scripts(script_file)]
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    tasks = []
+    for game_file in args.games:
+        tasks.extend(Task(game_file, label, moves) for label, moves in scripts)
+        if args.policy is not None:
+            tasks.extend(
+                Task(game_file, f'{args.policy}#{seed}', policy=args.policy,
+                     seed=seed, max_moves=args.max_moves)
+                for seed in range(args.seed, args.seed + args.episodes)
+            )
+    if not tasks:
+        parser.error('give --scripts and/or --policy to have games to play')
+
+    start = time.perf_counter()
+    summary = summarise(run_batch(tasks, args.workers))
+    elapsed = time.perf_counter() - start
+
+    for game_file, game_summary in summary.items():
+        print(f"{game_file}: {game_summary['episodes']} games, "
+              f"win rate {game_summary['win_rate']:.1%}, "
+              f"mean moves {game_summary['mean_moves']:.1f}, "
+              f"mean HP/hunger/thirst {game_summary['mean_hp']:.1f}/"
+              f"{game_summary['mean_hunger']:.1f}/"
+              f"{game_summary['mean_thirst']:.1f}")
+        if game_summary['errors']:
+            print(f"  {game_summary['errors']} games stopped by a level that "
+                  f"could not be read")
+        for level, level_summary in enumerate(game_summary['levels'], 1):
+            print(f"  level {level}: reached {level_summary['episodes']}, "
+                  f"mean moves {level_summary['mean_moves']:.1f}, "
+                  f"mean time {level_summary['mean_seconds'] * 1e3:.3f} ms")
+    print(f'{len(tasks)} games in {elapsed:.2f} s')
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(summary, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
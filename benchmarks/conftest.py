@@ -0,0 +1,90 @@
+""" Shared set up for the benchmarks of the game's hot paths.
+
+Results are kept as JSON in benchmarks/baselines. Save a new baseline with
+    python -m pytest benchmarks --benchmark-save=baseline
+Once one exists every run is compared with the latest one saved, and fails if
+the median time of a benchmark is more than REGRESSION_LIMIT worse. Pass
+--benchmark-compare or --benchmark-compare-fail to choose otherwise.
+"""
+from __future__ import annotations
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+ROOT = BENCHMARKS_DIR.parent
+BASELINES_DIR = BENCHMARKS_DIR / 'baselines'
+REGRESSION_LIMIT = 'median:25%'
+SORT_COLUMN = 'name'
+COLUMNS = ['min', 'median', 'mean', 'stddev', 'rounds']
+
+# The game's modules live at the top of the repository
+sys.path.insert(0, str(ROOT))
+
+from generator import generate_grid, write_game
+
+GAME_FILES = sorted(str(path.relative_to(ROOT))
+                    for path in (ROOT / 'games').glob('*.txt'))
+LARGE_DIMENSIONS = (501, 501)
+LARGE_LEVELS = 2
+
+
+def pytest_configure(config):
+    """ Keeps results in BASELINES_DIR, sorts and trims the results table, and
+        compares against the latest saved baseline, unless told otherwise on
+        the command line.
+    """
+    option = config.option
+    if getattr(option, 'benchmark_storage', None) is None:
+        return  # pytest-benchmark is not installed
+    if option.benchmark_sort == 'min':
+        option.benchmark_sort = SORT_COLUMN
+    if option.benchmark_columns is None:
+        option.benchmark_columns = COLUMNS
+    if option.benchmark_storage == 'file://./.benchmarks':
+        option.benchmark_storage = f'file://{BASELINES_DIR}'
+    if not option.benchmark_compare and not option.benchmark_compare_fail \
+            and any(BASELINES_DIR.glob('*/*.json')):
+        from pytest_benchmark.utils import parse_compare_fail
+        option.benchmark_compare = True
+        option.benchmark_compare_fail = [parse_compare_fail(REGRESSION_LIMIT)]
+
+
+@pytest.fixture(autouse=True)
+def in_repo(monkeypatch):
+    """ Runs every benchmark from the repository root, where the game reads
+        its game files and images from.
+    """
+    monkeypatch.chdir(ROOT)
+
+
+@pytest.fixture(scope='session')
+def large_game_file(tmp_path_factory) -> str:
+    """ Returns the path to a generated game file of large levels. """
+    path = tmp_path_factory.mktemp('games') / 'large.txt'
+    grids = (generate_grid(LARGE_DIMENSIONS, seed, lava_density=0.02,
+                           item_density=0.02)
+             for seed in range(LARGE_LEVELS))
+    with open(path, 'wb') as file:
+        write_game(grids, LARGE_DIMENSIONS, file)
+    return str(path)
+
+
+@pytest.fixture(scope='session')
+def tk_root():
+    """ Returns a hidden Tk window, skipping when there is no display to open
+        one on (run under a virtual display such as xvfb-run to include the
+        view benchmarks).
+    """
+    if sys.platform.startswith('linux') and not os.environ.get('DISPLAY'):
+        pytest.skip('no display; run under xvfb-run for view benchmarks')
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError as error:
+        pytest.skip(f'cannot open a Tk window: {error}')
+    root.withdraw()
+    yield root
+    root.destroy()
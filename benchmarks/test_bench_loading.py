@@ -0,0 +1,42 @@
+""" Benchmarks reading game files and saving and restoring games. """
+import json
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from a2_solution import Model, load_game
+from conftest import GAME_FILES
+from planner import plan_game, play_actions
+
+
+@pytest.mark.parametrize('game_file', GAME_FILES)
+def test_load_game(benchmark, game_file):
+    levels = benchmark(load_game, game_file)
+    assert levels
+
+
+def test_load_game_large(benchmark, large_game_file):
+    levels = benchmark.pedantic(load_game, (large_game_file,), rounds=5)
+    assert len(levels) == 2
+
+
+def _round_trip(model: Model) -> Model:
+    """ Saves a game to JSON text and loads it back, as the save menu does. """
+    return Model.from_state(json.loads(json.dumps(model.get_state())))
+
+
+def test_save_load_round_trip(benchmark):
+    # Part way through the game, with items held and some collected
+    plan, _ = plan_game('games/game2.txt')
+    model = Model('games/game2.txt')
+    play_actions(model, plan.actions[:len(plan.actions) // 2])
+
+    restored = benchmark(_round_trip, model)
+    assert restored.get_state() == model.get_state()
+
+
+def test_save_load_round_trip_large(benchmark, large_game_file):
+    model = Model(large_game_file)
+    restored = benchmark.pedantic(_round_trip, (model,), rounds=5)
+    assert restored.get_player_stats() == model.get_player_stats()
@@ -0,0 +1,56 @@
+""" Benchmarks the model's work on each move. """
+import random
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from a2_solution import Maze, Model
+from constants import MOVE_DELTAS
+
+NUM_MOVES = 1000
+
+
+def _random_deltas(seed: int) -> list[tuple[int, int]]:
+    """ Returns NUM_MOVES random move deltas. """
+    rng = random.Random(seed)
+    return [MOVE_DELTAS[move]
+            for move in rng.choices(tuple(MOVE_DELTAS), k=NUM_MOVES)]
+
+
+def _play(model: Model, deltas: list[tuple[int, int]]) -> None:
+    """ Makes every move, whether or not the game has already ended. """
+    move_player = model.move_player
+    for delta in deltas:
+        move_player(delta)
+
+
+@pytest.mark.parametrize('game_file', ['games/game2.txt', None],
+                         ids=['game2', 'large'])
+def test_move_player(benchmark, game_file, large_game_file):
+    """ Times NUM_MOVES moves on a fresh game each round. """
+    game_file = game_file or large_game_file
+    deltas = _random_deltas(0)
+    benchmark.extra_info['moves'] = NUM_MOVES
+
+    def setup():
+        return (Model(game_file), deltas), {}
+
+    benchmark.pedantic(_play, setup=setup, rounds=20)
+
+
+def test_unlock_door(benchmark, large_game_file):
+    maze = Model(large_game_file).get_current_maze()
+    dimensions = maze.get_dimensions()
+    layout = bytes(maze.get_layout())
+    doors = maze.get_door_positions()
+
+    def setup():
+        return (Maze.from_buffer(dimensions, layout, list(doors)),), {}
+
+    benchmark.pedantic(Maze.unlock_door, setup=setup, rounds=1000)
+
+
+def test_contains_coins(benchmark, large_game_file):
+    level = Model(large_game_file).get_level()
+    assert benchmark(level._contains_coins)
@@ -0,0 +1,32 @@
+""" Benchmarks drawing frames of the text interface. """
+import io
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from a2_solution import Model
+from a2_support import TextInterface
+
+
+def _draw(view: TextInterface, model: Model) -> None:
+    """ Draws the game's current frame, as MazeRunner does each turn. """
+    view.draw(model.get_current_maze(), model.get_current_items(),
+              model.get_player().get_position(), model.get_player_inventory(),
+              model.get_player_stats())
+
+
+@pytest.mark.parametrize('in_place', [False, True], ids=['plain', 'in_place'])
+@pytest.mark.parametrize('game_file', ['games/game2.txt', None],
+                         ids=['game2', 'large'])
+def test_text_draw(benchmark, monkeypatch, game_file, in_place,
+                   large_game_file):
+    model = Model(game_file or large_game_file)
+    output = io.StringIO()
+    monkeypatch.setattr('sys.stdout', output)
+    view = TextInterface(in_place)
+    _draw(view, model)  # In-place frames after the first only send changes
+    model.move_player((0, 1))
+
+    benchmark(_draw, view, model)
+    assert output.getvalue()
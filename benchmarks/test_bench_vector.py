@@ -0,0 +1,23 @@
+""" Benchmarks stepping many players at once with NumPy. """
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+np = pytest.importorskip('numpy')
+
+from a2_solution import Model
+from vector_sim import VectorSimulation
+
+NUM_PLAYERS = 10000
+NUM_TICKS = 100
+
+
+def test_vector_run(benchmark, large_game_file):
+    level = Model(large_game_file).get_level()
+    moves = np.random.default_rng(0).integers(
+        0, 4, size=(NUM_TICKS, NUM_PLAYERS), dtype=np.int64)
+    benchmark.extra_info['player_moves'] = NUM_PLAYERS * NUM_TICKS
+
+    def setup():
+        return (VectorSimulation(level, NUM_PLAYERS), moves), {}
+
+    benchmark.pedantic(VectorSimulation.run, setup=setup, rounds=5)
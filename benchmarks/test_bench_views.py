@@ -0,0 +1,44 @@
+""" Benchmarks drawing levels on the Tk canvas. These need a display, so run
+    them under a virtual one, e.g. xvfb-run python -m pytest benchmarks
+"""
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+pytest.importorskip('PIL')
+
+from a2_solution import Model
+from constants import MAZE_WIDTH, VIEWPORT_CELLS
+from a3 import ImageLevelView, LevelView
+
+VIEW_SIZE = (MAZE_WIDTH / 1.5, MAZE_WIDTH / 1.5)
+
+
+def _make_view(view_class, tk_root, model: Model, viewport=None):
+    """ Returns a view of the given class sized for the model's level. """
+    view = view_class(tk_root, model.get_level().get_dimensions(), VIEW_SIZE,
+                      viewport=viewport)
+    view.pack()
+    return view
+
+
+@pytest.mark.parametrize('view_class', [LevelView, ImageLevelView],
+                         ids=['shapes', 'images'])
+def test_view_draw(benchmark, tk_root, view_class):
+    model = Model('games/game2.txt')
+    view = _make_view(view_class, tk_root, model)
+    benchmark(view.draw, model.get_current_maze().get_tiles(),
+              model.get_current_items(), model.get_player().get_position())
+    tk_root.update_idletasks()
+    view.destroy()
+
+
+@pytest.mark.parametrize('view_class', [LevelView, ImageLevelView],
+                         ids=['shapes', 'images'])
+def test_view_draw_large(benchmark, tk_root, view_class, large_game_file):
+    """ Draws a large maze through the scrolling viewport. """
+    model = Model(large_game_file)
+    view = _make_view(view_class, tk_root, model, VIEWPORT_CELLS)
+    benchmark(view.draw_maze, model.get_current_maze(),
+              model.get_current_items(), model.get_player().get_position())
+    tk_root.update_idletasks()
+    view.destroy()
@@ -16,6 +16,9 @@ HONEY = 'H'
 APPLE = 'A'
 WATER = 'W'
 
+# Items that are all alike, so inventories only count them
+FUNGIBLE_ITEMS = (COIN,)
+
 # Masters entities
 CANDY = 'S'
 LAVA_SHOES = 'J'
@@ -43,11 +46,15 @@ LAVA_DAMAGE = 5
 
 WIN_MESSAGE = 'Congratulations! You have finished all levels and won the game!'
 LOSS_MESSAGE = 'You lose :('
+LEVEL_ERROR_MESSAGE = 'The next level could not be loaded:'
 ITEM_UNAVAILABLE_MESSAGE = '\nYou don\'t have any of that item!\n'
 
 # Assignment 3 constants
 GAME_FILE = 'games/game2.txt'
 TASK = 2
+# Input log that each game appends its moves and item uses to (see
+# recording.py), or None to not record
+RECORDING_FILE = None
 
 TILE_COLOURS = {
     LAVA: '#FFA384',
@@ -79,6 +86,9 @@ INVENTORY_WIDTH = 200
 STATS_HEIGHT = 100
 STATS_WIDTH = 800
 
+# Larger mazes are shown through a scrolling window of this many cells a side
+VIEWPORT_CELLS = 25
+
 TILE_IMAGES = {
     WALL: 'wall.png',
     EMPTY: 'grass.png',
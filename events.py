@@ -0,0 +1,60 @@
+""" The events a Model publishes to its subscribers as the game changes.
+
+Subscribers are given a list of events at a time. Each call to
+Model.move_player or Model.use_item sends its own list, in the order things
+happened, unless it runs inside Model.batch_events, in which case everything
+published in the batch is sent together once the batch ends.
+
+Example:
+    def log(events):
+        for event in events:
+            print(event)
+
+    model.subscribe(log)
+"""
+from __future__ import annotations
+from typing import Callable, NamedTuple, Union
+
+
+class PlayerMoved(NamedTuple):
+    """ The player stepped from one cell to another. """
+    old_position: tuple[int, int]
+    new_position: tuple[int, int]
+    num_moves: int  # Moves made in the game so far, including this one
+
+
+class ItemCollected(NamedTuple):
+    """ The player picked up an item from the maze. """
+    position: tuple[int, int]
+    item_id: str
+
+
+class StatsChanged(NamedTuple):
+    """ The player's stats changed, after a move or using an item. """
+    health: int
+    hunger: int
+    thirst: int
+
+
+class DoorsUnlocked(NamedTuple):
+    """ The last coin was collected and the doors opened. """
+    positions: list[tuple[int, int]]
+
+
+class LevelUp(NamedTuple):
+    """ The player left the maze and started the next level. """
+    level_num: int  # The index of the new level, counting from 0
+    dimensions: tuple[int, int]  # (#rows, #columns) of the new maze
+
+
+class Won(NamedTuple):
+    """ The player left the maze of the last level. """
+
+
+class Lost(NamedTuple):
+    """ The player's HP ran out or their hunger or thirst got too high. """
+
+
+Event = Union[PlayerMoved, ItemCollected, StatsChanged, DoorsUnlocked, LevelUp,
+              Won, Lost]
+Subscriber = Callable[[list[Event]], None]
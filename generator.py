@@ -0,0 +1,313 @@
+""" Generates random levels of any size, as game files or as Level objects.
+
+A level is laid out as a perfect maze on a grid of cells at odd (row, column)
+positions, carved by a recursive backtracker or by Kruskal's algorithm, so
+every open tile can reach every other. The player starts in the top-left cell
+and the door is on the right edge of the bottom-most row of cells. Lava and
+items are then scattered over the open tiles. Each level is one bytearray
+holding the character of every tile, and is written out a row at a time.
+
+Example:
+    python generator.py big.txt --size 2000 2000 --levels 2 --seed 7 \
+        --layout kruskal --lava 0.02 --items 0.01
+"""
+from __future__ import annotations
+import argparse
+import random
+import re
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional
+
+from a2_solution import Level, Maze, find_distances
+from constants import *
+
+# Relative chance of each kind of item being placed
+ITEM_WEIGHTS = {
+    COIN: 6,
+    POTION: 1,
+    APPLE: 1,
+    HONEY: 1,
+    WATER: 1,
+}
+
+_ENTITY_PATTERN = re.compile(
+    b'[' + re.escape(''.join(ITEM_WEIGHTS).encode() + PLAYER.encode()) + b']')
+
+# Maps every item and player ID to the empty tile beneath it
+_GROUND = bytes.maketrans(
+    ''.join(ITEM_WEIGHTS).encode() + PLAYER.encode(),
+    EMPTY.encode() * (len(ITEM_WEIGHTS) + 1)
+)
+
+
+def _find_all(grid: bytes, char: str) -> Iterator[int]:
+    """ Yields the index of every occurrence of char in grid. """
+    code = char.encode()
+    index = grid.find(code)
+    while index != -1:
+        yield index
+        index = grid.find(code, index + 1)
+
+
+def carve_backtracker(grid: bytearray, dimensions: tuple[int, int],
+                      rng: random.Random) -> None:
+    """ Carves a maze into a grid of walls with a depth-first search that
+        backtracks from dead ends, giving long winding corridors.
+
+    Parameters:
+        grid: The tiles, all walls, row by row
+        dimensions: (#rows, #columns) of the grid
+        rng: The random number generator to carve with
+    """
+    num_rows, num_cols = dimensions
+    cell_rows, cell_cols = (num_rows - 1) // 2, (num_cols - 1) // 2
+    visited = bytearray(cell_rows * cell_cols)
+    empty = ord(EMPTY)
+
+    visited[0] = 1
+    grid[num_cols + 1] = empty
+    stack = [0]
+    while stack:
+        cell = stack[-1]
+        row, col = divmod(cell, cell_cols)
+        options = []
+        if row > 0 and not visited[cell - cell_cols]:
+            options.append(cell - cell_cols)
+        if row < cell_rows - 1 and not visited[cell + cell_cols]:
+            options.append(cell + cell_cols)
+        if col > 0 and not visited[cell - 1]:
+            options.append(cell - 1)
+        if col < cell_cols - 1 and not visited[cell + 1]:
+            options.append(cell + 1)
+        if not options:
+            stack.pop()
+            continue
+
+        other = rng.choice(options)
+        visited[other] = 1
+        other_row, other_col = divmod(other, cell_cols)
+        # Open the new cell and the wall between the two cells
+        grid[(2 * other_row + 1) * num_cols + 2 * other_col + 1] = empty
+        grid[(row + other_row + 1) * num_cols + col + other_col + 1] = empty
+        stack.append(other)
+
+
+def carve_kruskal(grid: bytearray, dimensions: tuple[int, int],
+                  rng: random.Random) -> None:
+    """ Carves a maze into a grid of walls by knocking down the walls between
+        cells in random order whenever that joins two unconnected regions,
+        giving many short dead ends.
+
+    Parameters:
+        grid: The tiles, all walls, row by row
+        dimensions: (#rows, #columns) of the grid
+        rng: The random number generator to carve with
+    """
+    num_rows, num_cols = dimensions
+    cell_rows, cell_cols = (num_rows - 1) // 2, (num_cols - 1) // 2
+    empty = ord(EMPTY)
+    for row in range(cell_rows):
+        start = (2 * row + 1) * num_cols + 1
+        grid[start:start + 2 * cell_cols:2] = bytes([empty]) * cell_cols
+
+    # Walls are numbered 2 * cell (to the right) and 2 * cell + 1 (below)
+    walls = [2 * cell for cell in range(cell_rows * cell_cols)
+             if cell % cell_cols < cell_cols - 1]
+    walls.extend(2 * cell + 1 for cell in range((cell_rows - 1) * cell_cols))
+    rng.shuffle(walls)
+
+    parents = list(range(cell_rows * cell_cols))
+
+    def find(cell: int) -> int:
+        """ Returns the representative of the region containing cell. """
+        while parents[cell] != cell:
+            parents[cell] = parents[parents[cell]]
+            cell = parents[cell]
+        return cell
+
+    for wall in walls:
+        cell, below = divmod(wall, 2)
+        other = cell + (cell_cols if below else 1)
+        root, other_root = find(cell), find(other)
+        if root == other_root:
+            continue
+        parents[root] = other_root
+        row, col = divmod(cell, cell_cols)
+        grid[(2 * row + 1 + below) * num_cols + 2 * col + 2 - below] = empty
+
+
+# Maps layout names to functions carving a maze into a grid of walls
+LAYOUTS: dict[str, Callable[[bytearray, tuple[int, int], random.Random],
+                            None]] = {
+    'backtracker': carve_backtracker,
+    'kruskal': carve_kruskal,
+}
+
+
+def generate_grid(dimensions: tuple[int, int], seed: Optional[int] = None,
+                  layout: str = 'backtracker', lava_density: float = 0.0,
+                  item_density: float = 0.02) -> bytearray:
+    """ Generates the tiles, items and player start of a level.
+
+    Parameters:
+        dimensions: (#rows, #columns), each at least 3
+        seed: The seed for the random number generator; the same seed and
+              arguments always give the same level
+        layout: The name of the carving algorithm, from LAYOUTS
+        lava_density: The chance of each open tile becoming lava
+        item_density: The chance of each open tile holding an item
+
+    Returns:
+        The character of every tile in the game file format, row by row.
+
+    Raises:
+        ValueError: If the dimensions are too small or layout is unknown.
+    """
+    num_rows, num_cols = dimensions
+    if num_rows < 3 or num_cols < 3:
+        raise ValueError(f"A maze must be at least 3x3, not {dimensions}")
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout {layout!r}")
+    rng = random.Random(seed)
+    grid = bytearray(WALL.encode()) * (num_rows * num_cols)
+    LAYOUTS[layout](grid, dimensions, rng)
+
+    # The door leads off the right edge from the bottom-most row of cells,
+    # through an extra tile if the last cell is not next to the edge
+    door_row = num_rows - 2 if num_rows % 2 else num_rows - 3
+    grid[door_row * num_cols + num_cols - 2] = ord(EMPTY)
+    grid[door_row * num_cols + num_cols - 1] = ord(DOOR)
+
+    start = num_cols + 1
+    kinds, weights = list(ITEM_WEIGHTS), list(ITEM_WEIGHTS.values())
+    lava = ord(LAVA)
+    random_number = rng.random
+    index = grid.find(EMPTY.encode(), start + 1)
+    while index != -1:
+        chance = random_number()
+        if chance < item_density:
+            grid[index] = ord(rng.choices(kinds, weights)[0])
+        elif chance < item_density + lava_density:
+            grid[index] = lava
+        index = grid.find(EMPTY.encode(), index + 1)
+    grid[start] = ord(PLAYER)
+
+    check_solvable(grid, dimensions)
+    return grid
+
+
+def check_solvable(grid: bytearray, dimensions: tuple[int, int]) -> None:
+    """ Checks with a BFS from the player start that every coin and a door can
+        be reached, so that the level can be completed.
+
+    Parameters:
+        grid: The character of every tile, row by row
+        dimensions: (#rows, #columns) of the grid
+
+    Raises:
+        ValueError: If a coin or every door is out of reach.
+    """
+    num_cols = dimensions[1]
+    distances = find_distances(grid, num_cols, grid.index(PLAYER.encode()),
+                               {ord(WALL)})
+
+    for index in _find_all(grid, COIN):
+        if distances[index] < 0:
+            raise ValueError(
+                f"The coin at {divmod(index, num_cols)} cannot be reached")
+    if not any(distances[index] >= 0 for index in _find_all(grid, DOOR)):
+        raise ValueError("No door can be reached")
+
+
+def build_level(grid: bytearray, dimensions: tuple[int, int]) -> Level:
+    """ Builds a Level from a generated grid, without going through text.
+
+    Parameters:
+        grid: The character of every tile, row by row, as from generate_grid
+        dimensions: (#rows, #columns) of the grid
+    """
+    num_cols = dimensions[1]
+    tiles = grid.translate(_GROUND)
+    doors = [divmod(index, num_cols) for index in _find_all(tiles, DOOR)]
+
+    level = Level(dimensions, Maze.from_buffer(dimensions, tiles, doors))
+    # Add entities in row order, as reading the game file would
+    for match in _ENTITY_PATTERN.finditer(grid):
+        level.add_entity(divmod(match.start(), num_cols),
+                         chr(match.group()[0]))
+    return level
+
+
+def generate_levels(dimensions: tuple[int, int], num_levels: int,
+                    seed: Optional[int] = None, **options
+                    ) -> Iterator[Level]:
+    """ Yields newly generated levels one at a time.
+
+    Parameters:
+        dimensions: (#rows, #columns) of every level
+        num_levels: The number of levels to generate
+        seed: The seed of the first level; later levels use the next seeds
+        options: Passed on to generate_grid
+    """
+    for index in range(num_levels):
+        level_seed = None if seed is None else seed + index
+        yield build_level(generate_grid(dimensions, level_seed, **options),
+                          dimensions)
+
+
+def write_game(grids: Iterable[bytearray], dimensions: tuple[int, int],
+               file: BinaryIO) -> int:
+    """ Writes levels in the game file format, a row at a time.
+
+    Parameters:
+        grids: The generated grid of each level, in order
+        dimensions: (#rows, #columns) of every level
+        file: The binary file to write to
+
+    Returns:
+        The number of levels written.
+    """
+    num_rows, num_cols = dimensions
+    num_levels = 0
+    for num_levels, grid in enumerate(grids, start=1):
+        if num_levels > 1:
+            file.write(b'\n')
+        file.write(f'Maze {num_levels} - {num_rows} {num_cols}\n'.encode())
+        view = memoryview(grid)
+        for start in range(0, len(grid), num_cols):
+            file.write(view[start:start + num_cols])
+            file.write(b'\n')
+    return num_levels
+
+
+def main():
+    """ Writes a generated game file described on the command line. """
+    parser = argparse.ArgumentParser(
+        description='Generate a random MazeRunner game file.')
+    parser.add_argument('game_file', help='where to write the game file')
+    parser.add_argument('--size', nargs=2, type=int, default=(21, 21),
+                        metavar=('ROWS', 'COLUMNS'), help='size of each maze')
+    parser.add_argument('--levels', type=int, default=1,
+                        help='number of levels')
+    parser.add_argument('--seed', type=int, help='seed of the first level')
+    parser.add_argument('--layout', choices=sorted(LAYOUTS),
+                        default='backtracker', help='how mazes are carved')
+    parser.add_argument('--lava', type=float, default=0.0,
+                        help='chance of each open tile being lava')
+    parser.add_argument('--items', type=float, default=0.02,
+                        help='chance of each open tile holding an item')
+    args = parser.parse_args()
+
+    dimensions = tuple(args.size)
+    grids = (
+        generate_grid(dimensions,
+                      None if args.seed is None else args.seed + index,
+                      args.layout, args.lava, args.items)
+        for index in range(args.levels)
+    )
+    with open(args.game_file, 'wb') as file:
+        num_levels = write_game(grids, dimensions, file)
+    print(f'Wrote {num_levels} levels to {args.game_file}')
+
+
+if __name__ == '__main__':
+    main()
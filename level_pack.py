@@ -0,0 +1,213 @@
+""" Compiles text game files into binary level packs and loads levels from them.
+
+A pack is laid out as follows (all integers little-endian):
+    header:       magic b'MZPK', version (u16), reserved (u16),
+                  number of levels (u32), offset of the level table (u64)
+    levels:       for each level, rows, columns, player row, player column,
+                  number of items and number of doors (six u32), followed by
+                  rows * columns tile ID bytes, the items as (row u32,
+                  column u32, item ID u8) and the doors as (row u32, column u32)
+    level table:  the offset of each level record (u64 each)
+"""
+from __future__ import annotations
+import argparse
+import io
+import mmap
+import struct
+from typing import BinaryIO, Iterable, Iterator, Union
+
+from a2_solution import Level, Maze, iter_levels
+
+PACK_MAGIC = b'MZPK'
+PACK_VERSION = 1
+
+HEADER = struct.Struct('<4sHHIQ')
+LEVEL_HEADER = struct.Struct('<6I')
+ITEM = struct.Struct('<IIB')
+DOOR_POSITION = struct.Struct('<II')
+OFFSET = struct.Struct('<Q')
+
+
+def write_pack(levels: Iterable[Level], file: BinaryIO) -> int:
+    """ Writes the levels to a seekable binary file as a level pack. Levels are
+        written as they are produced, so a streamed game file is never held in
+        memory all at once.
+
+    Parameters:
+        levels: The levels to write, in order
+        file: The binary file to write to, positioned at the start of the pack
+
+    Returns:
+        The number of levels written.
+    """
+    start = file.tell()
+    file.write(HEADER.pack(PACK_MAGIC, PACK_VERSION, 0, 0, 0))
+    offsets = []
+    for level in levels:
+        maze = level.get_maze()
+        (num_rows, num_cols), items = level.get_dimensions(), level.get_items()
+        doors = maze.get_door_positions()
+        player_row, player_col = level.get_player_start()
+
+        offsets.append(file.tell() - start)
+        file.write(LEVEL_HEADER.pack(num_rows, num_cols, player_row,
+                                     player_col, len(items), len(doors)))
+        file.write(maze.get_layout())
+        file.write(b''.join(
+            ITEM.pack(row, col, ord(item.get_id()))
+            for (row, col), item in items.items()
+        ))
+        file.write(b''.join(DOOR_POSITION.pack(*door) for door in doors))
+
+    table_offset = file.tell() - start
+    file.write(b''.join(OFFSET.pack(offset) for offset in offsets))
+    end = file.tell()
+    file.seek(start)
+    file.write(HEADER.pack(PACK_MAGIC, PACK_VERSION, 0, len(offsets),
+                           table_offset))
+    file.seek(end)
+    return len(offsets)
+
+
+def compile_game(game_file: str, pack_file: str) -> int:
+    """ Compiles a text game file into a level pack.
+
+    Parameters:
+        game_file: The path to the text game file
+        pack_file: The path to write the level pack to
+
+    Returns:
+        The number of levels compiled.
+    """
+    with open(pack_file, 'wb') as file:
+        return write_pack(iter_levels(game_file), file)
+
+
+def pack_levels(levels: Iterable[Level]) -> bytes:
+    """ Returns the levels as an in-memory level pack.
+
+    Parameters:
+        levels: The levels to pack, in order
+    """
+    buffer = io.BytesIO()
+    write_pack(levels, buffer)
+    return buffer.getvalue()
+
+
+class LevelPack:
+    """ A read-only level pack. Only the header is read up front; each level
+        is built when requested, with its maze reading tiles straight from the
+        pack.
+    """
+    def __init__(self, source: Union[str, bytes]) -> None:
+        """ Opens a level pack.
+
+        Parameters:
+            source: The path to a pack file, which is memory-mapped, or the
+                    bytes of a pack already in memory.
+
+        Raises:
+            ValueError: If source is not a level pack of a supported version,
+                or its level table does not fit inside it.
+        """
+        if isinstance(source, str):
+            with open(source, 'rb') as file:
+                # The mapping stays valid after the file is closed
+                source = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(source)
+
+        if len(self._buffer) < HEADER.size:
+            raise ValueError("Not a level pack: file is too short")
+        magic, version, _, num_levels, table_offset = \
+            HEADER.unpack_from(self._buffer)
+        if magic != PACK_MAGIC:
+            raise ValueError("Not a level pack: bad magic number")
+        if version != PACK_VERSION:
+            raise ValueError(f"Unsupported level pack version {version}")
+
+        # Level records lie between the header and the table, which ends the
+        # pack
+        table_end = table_offset + num_levels * OFFSET.size
+        if table_offset < HEADER.size or table_end > len(self._buffer):
+            raise ValueError("Corrupt level pack: level table is out of range "
+                             "(the pack may be truncated)")
+        self._num_levels = num_levels
+        self._table_offset = table_offset
+
+    def __len__(self) -> int:
+        """ Returns the number of levels in this pack. """
+        return self._num_levels
+
+    def get_level(self, index: int) -> Level:
+        """ Builds the level at the given index.
+
+        Parameters:
+            index: The index of the level, counting from 0
+
+        Raises:
+            IndexError: If the pack has no level at index.
+            ValueError: If the level's record starts or runs outside the level
+                records, places the player, an item or a door outside its
+                maze, or has an unknown item.
+        """
+        if not 0 <= index < self._num_levels:
+            raise IndexError(f"Level pack has no level {index}")
+        buffer = self._buffer
+        offset, = OFFSET.unpack_from(
+            buffer, self._table_offset + index * OFFSET.size)
+        if not HEADER.size <= offset <= self._table_offset - LEVEL_HEADER.size:
+            raise ValueError(f"Corrupt level pack: level {index} starts "
+                             f"outside the level records")
+        num_rows, num_cols, player_row, player_col, num_items, num_doors = \
+            LEVEL_HEADER.unpack_from(buffer, offset)
+        offset += LEVEL_HEADER.size
+        record_end = offset + num_rows * num_cols + num_items * ITEM.size \
+            + num_doors * DOOR_POSITION.size
+        if record_end > self._table_offset:
+            raise ValueError(f"Corrupt level pack: level {index} runs past "
+                             f"the level records")
+
+        tiles = buffer[offset:offset + num_rows * num_cols]
+        offset += num_rows * num_cols
+        items = list(ITEM.iter_unpack(
+            buffer[offset:offset + num_items * ITEM.size]))
+        offset += num_items * ITEM.size
+        doors = list(DOOR_POSITION.iter_unpack(
+            buffer[offset:offset + num_doors * DOOR_POSITION.size]))
+
+        dimensions = (num_rows, num_cols)
+        positions = [(player_row, player_col)]
+        positions.extend((row, col) for row, col, _ in items)
+        positions.extend(doors)
+        if any(row >= num_rows or col >= num_cols for row, col in positions):
+            raise ValueError(f"Corrupt level pack: level {index} has a "
+                             f"position outside its {num_rows}x{num_cols} "
+                             f"maze")
+        if any(chr(item_id) not in Level.ENTITIES for _, _, item_id in items):
+            raise ValueError(f"Corrupt level pack: level {index} has an "
+                             f"unknown item")
+        level = Level(dimensions, Maze.from_buffer(dimensions, tiles, doors))
+        for row, col, item_id in items:
+            level.add_entity((row, col), chr(item_id))
+        level.add_player_start((player_row, player_col))
+        return level
+
+    def __iter__(self) -> Iterator[Level]:
+        """ Yields each level in order, building it only when it is reached. """
+        for index in range(self._num_levels):
+            yield self.get_level(index)
+
+
+def main():
+    """ Compiles a game file given on the command line into a level pack. """
+    parser = argparse.ArgumentParser(
+        description='Compile a MazeRunner game file into a level pack.')
+    parser.add_argument('game_file', help='the text game file to compile')
+    parser.add_argument('pack_file', help='where to write the level pack')
+    args = parser.parse_args()
+    num_levels = compile_game(args.game_file, args.pack_file)
+    print(f'Compiled {num_levels} levels into {args.pack_file}')
+
+
+if __name__ == '__main__':
+    main()
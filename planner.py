@@ -0,0 +1,510 @@
+""" Plans a winning sequence of moves and item uses for a whole game, or
+    proves that none exists.
+
+Items are only ever worth using just before the move that would otherwise
+lose the game: hunger, thirst and HP never go below 0 or above their limits
+then, so no part of an item's effect is wasted. The planner therefore tracks,
+instead of the inventory, how much each stat can still absorb:
+    HP:      HP - 1, plus the HP of every potion held
+    hunger:  MAX_HUNGER - 1 - hunger, plus the relief of all food held, plus
+             the number of times hunger has already risen (moves // 5)
+    thirst:  as for hunger, with water
+The player loses on the move that takes the HP allowance below 0, or takes
+moves // 5 above the hunger or thirst allowance.
+
+The search runs over the level's items as points of interest. For each pair
+of points it keeps every walk that is not beaten on both length and lava
+damage, so that detours around lava are considered. States are
+(point, items collected) with (moves, HP, hunger, thirst) allowances; a state
+is dropped if another at the same point and items has made no more moves and
+has no smaller allowance, or if the shortest route to the exit (from the
+solver) cannot be survived even by collecting every item left.
+"""
+from __future__ import annotations
+import argparse
+import heapq
+from array import array
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from a2_solution import (Food, Level, Model, Player, Potion, Water,
+                         iter_levels)
+from constants import *
+from level_pack import LevelPack
+from solver import Grid, UNREACHABLE
+
+# What each item adds to the (HP, hunger, thirst) allowances when used in time
+ITEM_GAINS = {
+    COIN: (0, 0, 0),
+    POTION: (POTION_AMOUNT, 0, 0),
+    APPLE: (0, -APPLE_AMOUNT, 0),
+    HONEY: (0, -HONEY_AMOUNT, 0),
+    WATER: (0, 0, -WATER_AMOUNT),
+}
+
+# Which kind of item relieves each stat, in the order of the allowances
+_RELIEF = (Potion, Food, Water)
+
+
+class Allowances(NamedTuple):
+    """ What a player can still survive; see the module docstring. """
+    moves: int  # Moves made since the start of the game
+    health: int
+    hunger: int
+    thirst: int
+
+    @classmethod
+    def from_player(cls, player: Player, moves: int = 0) -> Allowances:
+        """ Returns the allowances of a player, counting their inventory.
+
+        Parameters:
+            player: The player
+            moves: The number of moves made so far in the game
+        """
+        health = player.get_health() - 1
+        hunger = MAX_HUNGER - 1 - player.get_hunger() + moves // 5
+        thirst = MAX_THIRST - 1 - player.get_thirst() + moves // 5
+        inventory = player.get_inventory()
+        for name, count in inventory.get_counts().items():
+            gain_health, gain_hunger, gain_thirst = \
+                ITEM_GAINS[inventory.peek_item(name).get_id()]
+            health += gain_health * count
+            hunger += gain_hunger * count
+            thirst += gain_thirst * count
+        return cls(moves, health, hunger, thirst)
+
+    def dominates(self, other: Allowances) -> bool:
+        """ Returns True iff this player can survive anything other can. """
+        return self.moves <= other.moves and self.health >= other.health \
+            and self.hunger >= other.hunger and self.thirst >= other.thirst
+
+
+class LevelExit(NamedTuple):
+    """ One way of finishing a level. """
+    moves: str  # Move keys, ending with the move that leaves through a door
+    allowances: Allowances  # What the player can still survive afterwards
+
+
+class _Walk(NamedTuple):
+    """ A walk between two cells that avoids every item on the way. """
+    length: int
+    damage: int  # Total damage of the tiles stepped on, on top of 1 per move
+    cells: tuple[int, ...]  # The cells stepped on, in order
+
+
+class _LevelGraph:
+    """ The walks between the items of one level, found as they are needed.
+    """
+    def __init__(self, level: Level) -> None:
+        """ Indexes the items and doors of the level.
+
+        Parameters:
+            level: The level to plan in; it is not modified
+        """
+        self._level = level
+        self.grid = grid = Grid(level, lava_cost=False)
+        num_cols = grid.num_cols
+        self.damage = [None if cost is None else cost - 1
+                        for cost in Grid(level, lava_cost=True).open_costs]
+        self.doors = {row * num_cols + col for row, col
+                      in level.get_maze().get_door_positions()}
+
+        self.item_cells, self.gains, self.coin_mask = [], [], 0
+        for bit, ((row, col), item) in enumerate(level.get_items().items()):
+            self.item_cells.append(row * num_cols + col)
+            self.gains.append(ITEM_GAINS[item.get_id()])
+            if item.get_id() == COIN:
+                self.coin_mask |= 1 << bit
+        self.item_bits = {cell: 1 << bit
+                          for bit, cell in enumerate(self.item_cells)}
+
+        self.exit_cost, _, self.exit_keys = grid.exit_paths(
+            level.get_maze().get_door_positions())
+        self._walks = {}
+        self._distances = {}
+
+    def distances(self, cell: int) -> array:
+        """ Returns the fewest moves from cell to every cell with the doors
+            locked, ignoring items, as they are while coins remain (see
+            Level.get_distances). These stay the same if the level's doors
+            are unlocked.
+        """
+        if self._level.get_maze().is_locked():
+            return self._level.get_distances(divmod(cell, self.grid.num_cols))
+        distances = self._distances.get(cell)
+        if distances is None:
+            distances = array('i', self.grid.shortest_paths(cell)[0])
+            self._distances[cell] = distances
+        return distances
+
+    def walks(self, source: int, doors_open: bool) -> dict[int, list[_Walk]]:
+        """ Finds the walks from source to every item and, with the doors open,
+            every door that leads off the maze. Walks stop at the first item
+            they reach. Only walks not beaten on both length and damage by
+            another walk to the same cell are kept.
+
+        Parameters:
+            source: The cell to start from
+            doors_open: Whether the player can walk through doors
+
+        Returns:
+            Maps each reachable item or exit door to its walks, shortest first.
+        """
+        key = (source, doors_open)
+        if key in self._walks:
+            return self._walks[key]
+
+        neighbours, damage = self.grid.neighbours, self.damage
+        doors, stops = self.doors, self.item_bits
+        # Walks are grown one move at a time; each step keeps a walk to a cell
+        # only if it takes less damage than every shorter walk there
+        cells, damages, parents = [source], [0], [-1]
+        least_damage = {source: 0}
+        frontier, length, found = [0], 0, {}
+        while frontier:
+            length += 1
+            reached = {}
+            for label in frontier:
+                cell = cells[label]
+                if cell in stops and cell != source:
+                    continue
+                for other in neighbours(cell):
+                    step = damage[other]
+                    if step is None or (other in doors and not doors_open):
+                        continue
+                    new_damage = damages[label] + step
+                    if new_damage < least_damage.get(other, new_damage + 1) \
+                            and new_damage < reached.get(
+                                other, (new_damage + 1,))[0]:
+                        reached[other] = (new_damage, label)
+
+            frontier = []
+            for other, (new_damage, parent) in reached.items():
+                least_damage[other] = new_damage
+                frontier.append(len(cells))
+                cells.append(other)
+                damages.append(new_damage)
+                parents.append(parent)
+                if other in stops or (doors_open and other in self.exit_keys):
+                    walk, label = [], frontier[-1]
+                    while label > 0:
+                        walk.append(cells[label])
+                        label = parents[label]
+                    found.setdefault(other, []).append(
+                        _Walk(length, new_damage, tuple(reversed(walk))))
+
+        self._walks[key] = found
+        return found
+
+
+def _walk_allowances(allowances: Allowances, walk: _Walk
+                     ) -> Optional[Allowances]:
+    """ Returns the allowances after a walk, or None if the player loses on
+        the way.
+    """
+    moves = allowances.moves + walk.length
+    health = allowances.health - walk.length - walk.damage
+    if health < 0 or moves // 5 > allowances.hunger \
+            or moves // 5 > allowances.thirst:
+        return None
+    return allowances._replace(moves=moves, health=health)
+
+
+def _record(table: dict, key: tuple, allowances: Allowances) -> bool:
+    """ Adds allowances to the non-dominated set stored under key.
+
+    Returns:
+        False iff allowances were already dominated, so the state can be
+        dropped.
+    """
+    entries = table.setdefault(key, [])
+    if any(other.dominates(allowances) for other in entries):
+        return False
+    entries[:] = [other for other in entries
+                  if not allowances.dominates(other)]
+    entries.append(allowances)
+    return True
+
+
+def level_exits(level: Level, allowances: Allowances,
+                position: Optional[tuple[int, int]] = None
+                ) -> Iterator[LevelExit]:
+    """ Finds every way of finishing a level that is not dominated by another,
+        fewest moves first. The search only goes as far as the next exit
+        asked for, and stops when none are left.
+
+    Parameters:
+        level: The level to finish, with the items still on it
+        allowances: What the player can survive on entering the level
+        position: Where the player is, if not at the level's start
+    """
+    graph = _LevelGraph(level)
+    grid, item_bits, gains = graph.grid, graph.item_bits, graph.gains
+    all_items, coin_mask = (1 << len(graph.item_cells)) - 1, graph.coin_mask
+    row, col = position or level.get_player_start()
+    start = row * grid.num_cols + col
+    locked = level.get_maze().is_locked()
+
+    bounds = {}
+
+    def remaining_bound(mask: int) -> tuple[Optional[int], tuple]:
+        """ Returns a lower bound on the moves needed to collect the coins
+            missing from mask and reach an exit door (None if impossible),
+            and the total gains of the items missing from mask.
+        """
+        if mask in bounds:
+            return bounds[mask]
+        remaining = [cell for cell in graph.item_cells
+                     if not mask & item_bits[cell]]
+        gain = tuple(map(sum, zip((0, 0, 0), *(
+            gains[bit] for bit in range(len(gains)) if not mask >> bit & 1))))
+        coins = [cell for cell in remaining if coin_mask & item_bits[cell]]
+        if any(graph.exit_cost[cell] == UNREACHABLE for cell in coins):
+            bounds[mask] = (None, gain)
+            return bounds[mask]
+        # Prim's algorithm over the remaining coins, then the nearest exit
+        bound = 0
+        if coins:
+            best = {cell: graph.distances(coins[0])[cell]
+                    for cell in coins[1:]}
+            while best:
+                cell = min(best, key=best.get)
+                bound += best.pop(cell)
+                distances = graph.distances(cell)
+                for other in best:
+                    best[other] = min(best[other], distances[other])
+            bound += min(graph.exit_cost[cell] for cell in coins) - 1
+        bounds[mask] = (bound, gain)
+        return bounds[mask]
+
+    def estimate(cell: int, mask: int, state: Allowances) -> Optional[int]:
+        """ Returns a lower bound on the moves left to finish the level, or
+            None if the player cannot survive that many.
+        """
+        bound, (gain_health, gain_hunger, gain_thirst) = remaining_bound(mask)
+        if bound is None:
+            return None
+        if mask & coin_mask != coin_mask:
+            distances = graph.distances(cell)
+            nearest = min(distances[other] for other in graph.item_cells
+                          if coin_mask & item_bits[other]
+                          and not mask & item_bits[other])
+            if nearest == UNREACHABLE:
+                return None
+            bound += nearest
+        elif graph.exit_cost[cell] == UNREACHABLE:
+            return None
+        else:
+            bound = graph.exit_cost[cell] - 1
+        moves = state.moves + bound
+        if state.health + gain_health < bound \
+                or moves // 5 > state.hunger + gain_hunger \
+                or moves // 5 > state.thirst + gain_thirst:
+            return None
+        return bound
+
+    first_estimate = estimate(start, 0, allowances)
+    if first_estimate is None:
+        return
+    # Each node is (parent node, walk to it, exit key or None)
+    nodes = [(-1, (), None)]
+    table = {}
+    heap = []
+
+    def advance(node: int, mask: int, state: Allowances, target: int,
+                walk: _Walk) -> None:
+        """ Queues the state reached by taking walk to target, unless the
+            player loses on the way or the state is dominated.
+        """
+        state = _walk_allowances(state, walk)
+        if state is None:
+            return
+        if mask & coin_mask == coin_mask and target in graph.exit_keys:
+            if _record(table, (None, all_items), state):
+                nodes.append((node, walk.cells, graph.exit_keys[target]))
+                heapq.heappush(heap, (state.moves, len(nodes) - 1, target,
+                                      mask, state))
+            return
+
+        bit = item_bits.get(target, 0)
+        if bit and not mask & bit:
+            mask |= bit
+            gain_health, gain_hunger, gain_thirst = gains[bit.bit_length() - 1]
+            state = state._replace(health=state.health + gain_health,
+                                   hunger=state.hunger + gain_hunger,
+                                   thirst=state.thirst + gain_thirst)
+        new_estimate = estimate(target, mask, state)
+        if new_estimate is not None and _record(table, (target, mask), state):
+            nodes.append((node, walk.cells, None))
+            heapq.heappush(heap, (state.moves + new_estimate, len(nodes) - 1,
+                                  target, mask, state))
+
+    if locked and not coin_mask:
+        # With no coins to collect the doors open after the first move, which
+        # therefore cannot be onto a door
+        for other in grid.neighbours(start):
+            if graph.damage[other] is not None and other not in graph.doors:
+                advance(0, 0, allowances, other,
+                        _Walk(1, graph.damage[other], (other,)))
+    else:
+        _record(table, (start, 0), allowances)
+        heap.append((allowances.moves + first_estimate, 0, start, 0,
+                     allowances))
+
+    while heap:
+        _, node, cell, mask, state = heapq.heappop(heap)
+        if nodes[node][2] is not None:
+            walk_cells, key = [], nodes[node][2]
+            while node > 0:
+                parent, cells, _ = nodes[node]
+                walk_cells[:0] = cells
+                node = parent
+            keys = [grid.move_key(source, target) for source, target
+                    in zip([start] + walk_cells, walk_cells)]
+            yield LevelExit(''.join(keys) + key, state)
+            continue
+
+        collected_coins = mask & coin_mask == coin_mask
+        for target, walks in graph.walks(cell, collected_coins).items():
+            for walk in walks:
+                advance(node, mask, state, target, walk)
+
+
+class Plan(NamedTuple):
+    """ A way to win a game. """
+    actions: list[str]  # Move keys and item uses ('i <name>'), as typed in play
+    num_moves: int
+
+
+def plan_game(game_file: str, levels: Optional[Iterable[Level]] = None
+              ) -> tuple[Optional[Plan], int]:
+    """ Searches for a way to win a game from its start.
+
+    Parameters:
+        game_file: The path to the game file
+        levels: The game's levels, if already loaded by other means
+
+    Returns:
+        The plan with the fewest moves on each level in turn (or None if the
+        game cannot be won), and the index of the furthest level that can be
+        finished alive.
+    """
+    levels = list(levels if levels is not None else iter_levels(game_file))
+    start = Allowances(0, MAX_HEALTH - 1, MAX_HUNGER - 1, MAX_THIRST - 1)
+    furthest = -1
+
+    def search(index: int, allowances: Allowances) -> Optional[list[str]]:
+        """ Returns the moves finishing levels index onward, or None. """
+        nonlocal furthest
+        if index == len(levels):
+            return []
+        for level_exit in level_exits(levels[index], allowances):
+            furthest = max(furthest, index)
+            rest = search(index + 1, level_exit.allowances)
+            if rest is not None:
+                return [level_exit.moves] + rest
+        return None
+
+    moves = search(0, start)
+    if moves is None:
+        return None, furthest
+    moves = ''.join(moves)
+    return Plan(_add_item_uses(Model(game_file, levels), moves),
+                len(moves) - len(levels)), furthest
+
+
+def _add_item_uses(model: Model, moves: str) -> list[str]:
+    """ Plays moves, using an item just before any move that would otherwise
+        lose the game.
+
+    Returns:
+        The moves and item uses made, in order.
+    """
+    player, actions, num_moves = model.get_player(), [], 0
+    for move in moves:
+        row, col = player.get_position()
+        row_delta, col_delta = MOVE_DELTAS[move]
+        target = (row + row_delta, col + col_delta)
+        num_rows, num_cols = model.get_level().get_dimensions()
+        if 0 <= target[0] < num_rows and 0 <= target[1] < num_cols:
+            tile = model.get_current_maze().get_tile(target)
+            if not tile.is_blocking():
+                num_moves += 1
+                tick = num_moves % 5 == 0
+                needs = (player.get_health() <= 1 + tile.damage(),
+                         tick and player.get_hunger() + 1 >= MAX_HUNGER,
+                         tick and player.get_thirst() + 1 >= MAX_THIRST)
+                inventory = player.get_inventory()
+                for needed, kind in zip(needs, _RELIEF):
+                    if not needed:
+                        continue
+                    name = next(name for name in inventory.get_counts()
+                                if isinstance(inventory.peek_item(name), kind))
+                    inventory.remove_item(name).apply(player)
+                    actions.append(f'i {name}')
+        model.move_player(MOVE_DELTAS[move])
+        actions.append(move)
+    return actions
+
+
+def play_actions(model: Model, actions: Iterable[str]) -> None:
+    """ Plays moves and item uses the way MazeRunner does, stopping once the
+        game is won or lost.
+
+    Parameters:
+        model: The game to play, which is updated in place
+        actions: Move keys and item uses ('i <name>')
+    """
+    for action in actions:
+        if action in MOVE_DELTAS:
+            model.move_player(MOVE_DELTAS[action])
+        else:
+            item = model.get_player_inventory().remove_item(
+                action.partition(' ')[-1])
+            if item is None:
+                raise ValueError(f"No item to use for {action!r}")
+            item.apply(model.get_player())
+        if model.has_won() or model.has_lost():
+            return
+
+
+def _load_levels(path: str) -> list[Level]:
+    """ Loads the levels from a level pack or a text game file. """
+    try:
+        return list(LevelPack(path))
+    except ValueError:
+        return list(iter_levels(path))
+
+
+def main():
+    """ Plans every game given on the command line and checks each plan by
+        playing it. Exits with status 1 if any game cannot be won.
+    """
+    parser = argparse.ArgumentParser(description='Find a way to win each '
+                                     'MazeRunner game or prove there is none.')
+    parser.add_argument('games', nargs='+',
+                        help='game files or level packs to plan')
+    parser.add_argument('--show', action='store_true',
+                        help='print the actions of each plan')
+    args = parser.parse_args()
+
+    unwinnable = 0
+    for path in args.games:
+        plan, furthest = plan_game(path, _load_levels(path))
+        if plan is None:
+            unwinnable += 1
+            print(f'{path}: cannot be won; no way to survive level '
+                  f'{furthest + 2}')
+            continue
+        model = Model(path, _load_levels(path))
+        play_actions(model, plan.actions)
+        uses = sum(action not in MOVE_DELTAS for action in plan.actions)
+        check = 'ok' if model.has_won() else 'FAILED in play'
+        print(f'{path}: won in {plan.num_moves} moves with {uses} item uses '
+              f'({check})')
+        if args.show:
+            print(' '.join(plan.actions))
+    raise SystemExit(1 if unwinnable else 0)
+
+
+if __name__ == '__main__':
+    main()
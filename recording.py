@@ -0,0 +1,400 @@
+""" Records the inputs of a game to a compact binary log and replays them
+    through a headless Model.
+
+Each run of the game appends one session to the log. A session is laid out as
+follows (all fixed-size integers little-endian):
+    header:   magic b'MZRL', version (u8), length of the game file path (u16),
+              then the path in UTF-8
+    records:  a kind byte, the microseconds since the previous record (or the
+              start of the session) as an unsigned LEB128 varint, then:
+              - move keys (see MOVE_DELTAS): nothing more
+              - ITEM_USED: the item name, as a varint length and UTF-8
+              - LEVEL_UP: the index of the new level, as a varint
+              - RESTARTED: nothing more
+              - LOADED: the Model.get_state snapshot, as a varint length and
+                UTF-8 JSON
+
+Records are written and flushed one at a time, so a log stays readable up to
+the last complete record if the game stops unexpectedly. Level-ups are not
+inputs; replays use them to check that the game has not diverged.
+
+Example:
+    python recording.py session.mzrl --real-time
+"""
+from __future__ import annotations
+import argparse
+import json
+import struct
+import time
+from typing import BinaryIO, Callable, Iterator, NamedTuple, Optional, Union
+
+from a2_solution import Model
+from constants import MOVE_DELTAS
+
+LOG_MAGIC = b'MZRL'
+LOG_VERSION = 1
+
+SESSION_HEADER = struct.Struct('<4sBH')
+
+ITEM_USED = 'i'
+LEVEL_UP = 'l'
+RESTARTED = 'r'
+LOADED = 'o'
+
+
+class Record(NamedTuple):
+    """ One entry in an input log. """
+    time: float  # Seconds since the start of the session
+    kind: str  # A move key, ITEM_USED, LEVEL_UP, RESTARTED or LOADED
+    value: Union[str, int, dict, None] = None  # Item name, level or state
+
+
+class Session(NamedTuple):
+    """ The records of one run of the game. """
+    game_file: str
+    records: list[Record]
+
+
+class ReplayResult(NamedTuple):
+    """ The outcome of replaying a session. """
+    model: Model  # The model in its final state
+    inputs_applied: int  # Moves, item uses, restarts and loads replayed
+    divergence: Optional[int]  # Index of the first level-up record that did
+                               # not happen in the replay, if any
+
+
+def _write_varint(value: int) -> bytes:
+    """ Returns value as an unsigned LEB128 varint. """
+    data = bytearray()
+    while value >= 0x80:
+        data.append(value & 0x7F | 0x80)
+        value >>= 7
+    data.append(value)
+    return bytes(data)
+
+
+def _read_varint(data: bytes, offset: int) -> tuple[int, int]:
+    """ Reads an unsigned LEB128 varint.
+
+    Returns:
+        The value and the offset just past it.
+
+    Raises:
+        IndexError: If data ends in the middle of the varint.
+    """
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class InputRecorder:
+    """ Appends the inputs of one run of the game to a log file. """
+    def __init__(self, path: str, game_file: str,
+                 clock: Callable[[], int] = time.monotonic_ns) -> None:
+        """ Opens the log for appending and starts a new session in it.
+
+        Parameters:
+            path: The log file, which is created if it does not exist
+            game_file: The game file being played
+            clock: Returns the current time in nanoseconds; never goes back
+        """
+        self._clock = clock
+        self._file: BinaryIO = open(path, 'ab')
+        name = game_file.encode('utf-8')
+        self._file.write(SESSION_HEADER.pack(LOG_MAGIC, LOG_VERSION,
+                                             len(name)) + name)
+        self._file.flush()
+        self._last_time = clock()
+
+    def _write(self, kind: str, payload: bytes = b'') -> None:
+        """ Appends one record, timed from the previous one. """
+        now = self._clock()
+        elapsed = (now - self._last_time) // 1000
+        self._last_time = now
+        self._file.write(kind.encode('ascii') + _write_varint(elapsed)
+                         + payload)
+        self._file.flush()
+
+    def _write_text(self, kind: str, text: str) -> None:
+        """ Appends a record whose payload is a length-prefixed string. """
+        data = text.encode('utf-8')
+        self._write(kind, _write_varint(len(data)) + data)
+
+    def record_move(self, move: str) -> None:
+        """ Records a move key (one of MOVE_DELTAS) the game accepted.
+
+        Parameters:
+            move: The move key
+        """
+        self._write(move)
+
+    def record_item(self, item_name: str) -> None:
+        """ Records the player using an item.
+
+        Parameters:
+            item_name: The name of the item used
+        """
+        self._write_text(ITEM_USED, item_name)
+
+    def record_level_up(self, level_num: int) -> None:
+        """ Records the player reaching a new level.
+
+        Parameters:
+            level_num: The index of the new level, counting from 0
+        """
+        self._write(LEVEL_UP, _write_varint(level_num))
+
+    def record_restart(self) -> None:
+        """ Records the game being restarted from its game file. """
+        self._write(RESTARTED)
+
+    def record_load(self, state: dict) -> None:
+        """ Records a saved game being loaded.
+
+        Parameters:
+            state: The snapshot the game was loaded from (see Model.get_state)
+        """
+        self._write_text(LOADED, json.dumps(state, separators=(',', ':')))
+
+    def close(self) -> None:
+        """ Closes the log file. """
+        self._file.close()
+
+
+def _read_header(data: bytes, offset: int) -> tuple[str, int]:
+    """ Reads the session header starting at offset.
+
+    Returns:
+        The session's game file and the offset just past the header.
+
+    Raises:
+        IndexError: If data ends in the middle of the header.
+        ValueError: If there is no session header of a supported version at
+            offset.
+    """
+    magic = data[offset:offset + len(LOG_MAGIC)]
+    if not LOG_MAGIC.startswith(magic):
+        raise ValueError(f"Not an input log: bad magic number at byte "
+                         f"{offset}")
+    if len(data) - offset < SESSION_HEADER.size:
+        raise IndexError(len(data))
+    _, version, name_length = SESSION_HEADER.unpack_from(data, offset)
+    if version != LOG_VERSION:
+        raise ValueError(f"Unsupported input log version {version}")
+    offset += SESSION_HEADER.size
+    if offset + name_length > len(data):
+        raise IndexError(offset + name_length)
+    game_file = data[offset:offset + name_length].decode('utf-8')
+    return game_file, offset + name_length
+
+
+def _read_record(data: bytes, offset: int
+                 ) -> tuple[str, int, Union[str, int, dict, None], int]:
+    """ Reads the record starting at offset.
+
+    Returns:
+        The record's kind, its time since the previous record in
+        microseconds, its value and the offset just past it.
+
+    Raises:
+        IndexError: If data ends in the middle of the record.
+        ValueError: If the record is of an unknown kind or its text cannot be
+            decoded.
+    """
+    kind = chr(data[offset])
+    delta, end = _read_varint(data, offset + 1)
+    value = None
+    if kind in (ITEM_USED, LOADED):
+        length, end = _read_varint(data, end)
+        if end + length > len(data):
+            raise IndexError(end + length)
+        value = data[end:end + length].decode('utf-8')
+        if kind == LOADED:
+            value = json.loads(value)
+        end += length
+    elif kind == LEVEL_UP:
+        value, end = _read_varint(data, end)
+    elif kind not in MOVE_DELTAS and kind != RESTARTED:
+        raise ValueError(f"Unknown record kind {kind!r} at byte {offset}")
+    return kind, delta, value, end
+
+
+def _is_header(data: bytes, offset: int) -> bool:
+    """ Returns whether a readable session header starts at offset. """
+    try:
+        _read_header(data, offset)
+    except (IndexError, ValueError):
+        return False
+    return True
+
+
+def _find_sessions(data: bytes, start: int, end: int) -> list[int]:
+    """ Returns the offsets of the session magic numbers that start within
+        data[start:end].
+    """
+    offsets = []
+    offset = data.find(LOG_MAGIC, start, end + len(LOG_MAGIC) - 1)
+    while offset != -1:
+        offsets.append(offset)
+        offset = data.find(LOG_MAGIC, offset + 1, end + len(LOG_MAGIC) - 1)
+    return offsets
+
+
+def iter_sessions(data: bytes) -> Iterator[Session]:
+    """ Yields each session in the bytes of an input log. Headers and records
+        are read in order. When one cannot be read, it was cut short by the
+        game stopping: it is left out, and reading carries on from the next
+        session header.
+
+    Raises:
+        ValueError: If data is not an input log of a supported version.
+    """
+    offset = 0
+    while offset < len(data):
+        start = offset
+        try:
+            game_file, offset = _read_header(data, start)
+        except (IndexError, ValueError) as error:
+            # The first session must start the log; any later header that
+            # cannot be read was cut short
+            if start == 0 and isinstance(error, ValueError):
+                raise
+            offset = data.find(LOG_MAGIC, start + 1)
+            if offset == -1:
+                return
+            continue
+
+        # A payload may happen to contain the magic number, so one found in
+        # the header or a record is only taken to start a session if a later
+        # record cannot be read. Each is kept with the number of records read
+        # before it (None for the header).
+        suspects = [(suspect, None)
+                    for suspect in _find_sessions(data, start + 1, offset)]
+        records, elapsed, header_cut = [], 0, False
+        while offset < len(data):
+            if data.startswith(LOG_MAGIC, offset) and _is_header(data, offset):
+                break
+            try:
+                kind, delta, value, end = _read_record(data, offset)
+            except (IndexError, ValueError):
+                # The session was cut short. The next one starts at the latest
+                # suspect with a readable header, or else the next magic number
+                offset = data.find(LOG_MAGIC, offset + 1)
+                if offset == -1:
+                    offset = len(data)
+                for suspect, num_records in reversed(suspects):
+                    if not _is_header(data, suspect):
+                        continue
+                    offset = suspect
+                    if num_records is None:
+                        header_cut = True
+                    else:
+                        del records[num_records:]
+                    break
+                break
+            suspects.extend((suspect, len(records)) for suspect
+                            in _find_sessions(data, offset + 1, end))
+            elapsed += delta
+            records.append(Record(elapsed / 1e6, kind, value))
+            offset = end
+        if not header_cut:
+            yield Session(game_file, records)
+
+
+def read_log(path: str) -> list[Session]:
+    """ Reads every session from an input log file.
+
+    Parameters:
+        path: The log file
+
+    Raises:
+        ValueError: If the file is not an input log of a supported version.
+    """
+    with open(path, 'rb') as file:
+        return list(iter_sessions(file.read()))
+
+
+def replay_session(session: Session, real_time: bool = False,
+                   sleep: Callable[[float], None] = time.sleep
+                   ) -> ReplayResult:
+    """ Plays a session's inputs through a new headless Model, stopping early
+        if the game is won or lost.
+
+    Parameters:
+        session: The session to replay
+        real_time: Whether to wait between inputs as long as the player did,
+                   rather than replaying at full speed
+        sleep: Waits for the given number of seconds
+    """
+    model = Model(session.game_file)
+    inputs_applied, divergence = 0, None
+    start = time.monotonic()
+    for index, record in enumerate(session.records):
+        if model.has_won() or model.has_lost():
+            break
+        if real_time:
+            delay = record.time - (time.monotonic() - start)
+            if delay > 0:
+                sleep(delay)
+
+        if record.kind == LEVEL_UP:
+            if divergence is None and not (
+                    model.did_level_up()
+                    and model.get_level_num() == record.value):
+                divergence = index
+            continue
+        if record.kind == ITEM_USED:
+            model.use_item(record.value)
+        elif record.kind == RESTARTED:
+            model = Model(session.game_file)
+        elif record.kind == LOADED:
+            model = Model.from_state(record.value)
+        else:
+            model.move_player(MOVE_DELTAS[record.kind])
+        inputs_applied += 1
+    return ReplayResult(model, inputs_applied, divergence)
+
+
+def main():
+    """ Replays the sessions of an input log and reports how each ended. """
+    parser = argparse.ArgumentParser(
+        description='Replay a recorded MazeRunner input log headlessly.')
+    parser.add_argument('log', help='the input log to replay')
+    parser.add_argument('--session', type=int,
+                        help='replay only this session, counting from 1')
+    parser.add_argument('--real-time', action='store_true',
+                        help='wait between inputs as long as the player did')
+    args = parser.parse_args()
+
+    sessions = read_log(args.log)
+    numbered = list(enumerate(sessions, start=1))
+    if args.session is not None:
+        numbered = [(num, session) for num, session in numbered
+                    if num == args.session]
+        if not numbered:
+            parser.error(f'{args.log} has {len(sessions)} sessions')
+
+    for session_num, session in numbered:
+        start = time.perf_counter()
+        result = replay_session(session, args.real_time)
+        elapsed = time.perf_counter() - start
+        model = result.model
+        outcome = 'won' if model.has_won() else 'lost' if model.has_lost() \
+            else f'on level {model.get_level_num() + 1}'
+        print(f'Session {session_num} ({session.game_file}): '
+              f'{result.inputs_applied} inputs, {outcome}, '
+              f'replayed in {elapsed:.3f}s')
+        if result.divergence is not None:
+            record = session.records[result.divergence]
+            print(f'  diverged at record {result.divergence}: recorded level '
+                  f'up to level {record.value + 1} at {record.time:.3f}s did '
+                  f'not happen')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+""" Headless engine that plays move sequences through a Model without a view.
+"""
+from __future__ import annotations
+from typing import NamedTuple, Optional, Union
+
+from a2_solution import GameFileError, Model
+from constants import MOVE_DELTAS
+from events import Event, ItemCollected, LevelUp, Lost, PlayerMoved, Won
+
+ITEM_PICKED = 'item_picked'
+DAMAGE = 'damage'
+LEVEL_UP = 'level_up'
+WON = 'won'
+LOST = 'lost'
+
+# Maps every byte to its move delta, or None if it is not a move
+_DELTAS_BY_CODE = tuple(MOVE_DELTAS.get(chr(code)) for code in range(256))
+
+
+class StepEvent(NamedTuple):
+    """ Something that happened on one step of a simulation. """
+    step: int  # Index of the move in the move sequence
+    kind: str  # One of ITEM_PICKED, DAMAGE, LEVEL_UP, WON or LOST
+    value: Union[str, int, None] = None  # Item ID, damage taken or new level
+
+
+class SimulationResult(NamedTuple):
+    """ The outcome of running a move sequence. """
+    model: Model  # The model in its final state
+    moves_applied: int  # Number of moves run before the sequence or game ended
+    events: list[StepEvent]
+    error: Optional[GameFileError] = None  # Why the next level could not be
+                                           # read, if that stopped the game
+
+
+def _step_events(model: Model, step: int,
+                 published: list[Event]) -> list[StepEvent]:
+    """ Returns the step events for the events a model published on one move.
+
+    Parameters:
+        model: The model the move was made on
+        step: The index of the move in the move sequence
+        published: The events the model published for the move, in order
+    """
+    events, lost = [], False
+    for event in published:
+        if isinstance(event, PlayerMoved):
+            tile = model.get_current_maze().get_tile(event.new_position)
+            if tile.damage():
+                events.append(StepEvent(step, DAMAGE, tile.damage()))
+        elif isinstance(event, ItemCollected):
+            events.append(StepEvent(step, ITEM_PICKED, event.item_id))
+        elif isinstance(event, LevelUp):
+            events.append(StepEvent(step, LEVEL_UP, event.level_num))
+        elif isinstance(event, Won):
+            events.append(StepEvent(step, WON))
+        elif isinstance(event, Lost):
+            lost = True
+    # Losing is reported after whatever else happened on the move
+    if lost:
+        events.append(StepEvent(step, LOST))
+    return events
+
+
+def simulate(game: Union[Model, str], moves: Union[str, bytes, bytearray],
+             record_events: bool = True,
+             stop_at_level_up: bool = False) -> SimulationResult:
+    """ Applies a sequence of moves to a game until the moves run out, the
+        game is won or lost, or the next level cannot be read (or, optionally,
+        the player reaches a new level).
+
+    Parameters:
+        game: The Model to play, which is updated in place, or the path to a
+              game file to start a new game from.
+        moves: The moves, one per character or byte (e.g. "wwdds" or
+               b"wwdds"), using the keys in MOVE_DELTAS.
+        record_events: Whether to report per-step events. Turning this off
+                       makes long replays faster, and sends the model's
+                       subscribers the whole run as one batch rather than a
+                       batch per move.
+        stop_at_level_up: Whether to stop after the move that completes the
+                          current level, so callers can handle levels one at
+                          a time.
+
+    Raises:
+        ValueError: If moves contains something other than a move key, in
+                    which case no move is made.
+    """
+    if isinstance(moves, str):
+        moves = moves.encode('ascii', errors='replace')
+    # Check every move before any is made, so a bad sequence leaves the game
+    # as it was
+    path = [_DELTAS_BY_CODE[code] for code in moves]
+    if None in path:
+        step = path.index(None)
+        raise ValueError(f"Move {step} ({chr(moves[step])!r}) is not a move "
+                         f"key")
+    model = Model(game) if isinstance(game, str) else game
+
+    events = []
+    move_player = model.move_player
+    has_won, has_lost, get_error = \
+        model.has_won, model.has_lost, model.get_error
+    moves_applied = 0
+    if has_won() or has_lost() or get_error() is not None:
+        return SimulationResult(model, moves_applied, events, get_error())
+
+    if not record_events:
+        # Subscribers to the model get the whole run as one batch of events
+        with model.batch_events():
+            for delta in path:
+                move_player(delta)
+                moves_applied += 1
+                if has_won() or has_lost() or get_error() is not None \
+                        or (stop_at_level_up and model.did_level_up()):
+                    break
+        return SimulationResult(model, moves_applied, events, get_error())
+
+    # Each move's events are sent to subscribers, and turned into step
+    # events, as soon as the move is made
+    published = []
+    collect = published.extend
+    model.subscribe(collect)
+    try:
+        for step, delta in enumerate(path):
+            move_player(delta)
+            moves_applied += 1
+            events.extend(_step_events(model, step, published))
+            published.clear()
+            if has_won() or has_lost() or get_error() is not None \
+                    or (stop_at_level_up and model.did_level_up()):
+                break
+    finally:
+        model.unsubscribe(collect)
+
+    return SimulationResult(model, moves_applied, events, get_error())
@@ -0,0 +1,360 @@
+""" Finds the shortest route through a level: collect every coin, then leave
+    the maze through a door.
+
+Distances between the start and the coins are found once with BFS (or
+Dijkstra when lava damage is counted). An A* search then runs over
+(last coin reached, coins collected) with an admissible bound: the distance to
+the nearest remaining coin, plus a minimum spanning tree over the remaining
+coins, plus the cheapest exit from any of them. Walking past a coin collects
+it, so only coins that can be reached without passing another uncollected
+coin are expanded; this loses nothing since the coin in the way costs nothing
+extra to take first.
+"""
+from __future__ import annotations
+import argparse
+import heapq
+from typing import NamedTuple, Optional
+
+from a2_solution import Level, Maze, Model, iter_levels
+from constants import *
+from simulation import simulate
+
+UNREACHABLE = -1
+
+
+class Route(NamedTuple):
+    """ A way to complete a level. """
+    moves: str  # Move keys, ending with the move that leaves through a door
+    cost: int  # Number of moves, plus lava damage if that was counted
+
+
+class Grid:
+    """ The walkable cells of a level as flat indices (row * columns + col).
+    """
+    def __init__(self, level: Level, lava_cost: bool) -> None:
+        """ Works out the cost of stepping onto each cell.
+
+        Parameters:
+            level: The level to route through
+            lava_cost: Whether stepping on lava costs its damage as well as
+                       the move
+        """
+        self._level = level
+        self.num_rows, self.num_cols = level.get_dimensions()
+        maze = level.get_maze()
+        # The tile types are stateless, so one of each gives the costs
+        costs = {}
+        for code in set(maze.get_layout()):
+            tile = Maze.TILES[chr(code)]()
+            costs[code] = None if tile.is_blocking() \
+                else 1 + (tile.damage() if lava_cost else 0)
+        # Doors only open once every coin is collected, so they are walls
+        # until the final leg to the exit
+        self.open_costs = [costs[code] if code != ord(DOOR) else 1
+                           for code in maze.get_layout()]
+        self.locked_costs = [None if code == ord(DOOR) else costs[code]
+                             for code in maze.get_layout()]
+        self.weighted = any(cost not in (None, 1) for cost in self.open_costs)
+
+    def neighbours(self, index: int) -> list[int]:
+        """ Returns the in-bounds cells next to index. """
+        num_cols = self.num_cols
+        row, col = divmod(index, num_cols)
+        cells = []
+        if row > 0:
+            cells.append(index - num_cols)
+        if row < self.num_rows - 1:
+            cells.append(index + num_cols)
+        if col > 0:
+            cells.append(index - 1)
+        if col < num_cols - 1:
+            cells.append(index + 1)
+        return cells
+
+    def move_key(self, source: int, target: int) -> str:
+        """ Returns the key that moves the player from source to target. """
+        return {-self.num_cols: UP, self.num_cols: DOWN, -1: LEFT,
+                1: RIGHT}[target - source]
+
+    def shortest_paths(self, source: int) -> tuple[list[int], list[int]]:
+        """ Finds the cheapest walk from source to every cell while the doors
+            are locked. Without lava costs these are the level's own cached
+            distances (see Level.get_distances).
+
+        Returns:
+            The cost to reach each cell (UNREACHABLE if it cannot be reached)
+            and the previous cell on the walk there.
+        """
+        costs, neighbours = self.locked_costs, self.neighbours
+        parent = [UNREACHABLE] * len(costs)
+        if not self.weighted and self._level.get_maze().is_locked():
+            dist = self._level.get_distances(divmod(source, self.num_cols))
+            # Any neighbour one move closer to source is a previous cell
+            for cell, cost in enumerate(dist):
+                if cost > 0:
+                    parent[cell] = next(other for other in neighbours(cell)
+                                        if dist[other] == cost - 1)
+            return dist, parent
+
+        dist = [UNREACHABLE] * len(costs)
+        dist[source] = 0
+
+        heap = [(0, source)]
+        while heap:
+            cost, cell = heapq.heappop(heap)
+            if cost > dist[cell]:
+                continue
+            for other in neighbours(cell):
+                step = costs[other]
+                if step is None:
+                    continue
+                if dist[other] == UNREACHABLE or cost + step < dist[other]:
+                    dist[other] = cost + step
+                    parent[other] = cell
+                    heapq.heappush(heap, (cost + step, other))
+        return dist, parent
+
+    def exit_paths(self, doors: list[tuple[int, int]]
+                   ) -> tuple[list[int], list[int], dict[int, str]]:
+        """ Finds the cheapest way out of the maze from every cell once the
+            doors are open, searching backwards from the doors.
+
+        Returns:
+            The cost of leaving from each cell (including the final move off
+            the maze), the next cell on the way out, and the key that leaves
+            the maze from each door.
+        """
+        costs, neighbours = self.open_costs, self.neighbours
+        dist = [UNREACHABLE] * len(costs)
+        next_cell = [UNREACHABLE] * len(costs)
+        exit_keys = {}
+        heap = []
+        for row, col in doors:
+            for key, (row_delta, col_delta) in MOVE_DELTAS.items():
+                new_row, new_col = row + row_delta, col + col_delta
+                if not (0 <= new_row < self.num_rows
+                        and 0 <= new_col < self.num_cols):
+                    door = row * self.num_cols + col
+                    dist[door] = 1
+                    exit_keys[door] = key
+                    heap.append((1, door))
+                    break
+
+        heapq.heapify(heap)
+        while heap:
+            cost, cell = heapq.heappop(heap)
+            if cost > dist[cell]:
+                continue
+            for other in neighbours(cell):
+                if costs[other] is None:
+                    continue
+                # Moving from other onto cell costs the price of cell
+                new_cost = cost + costs[cell]
+                if dist[other] == UNREACHABLE or new_cost < dist[other]:
+                    dist[other] = new_cost
+                    next_cell[other] = cell
+                    heapq.heappush(heap, (new_cost, other))
+        return dist, next_cell, exit_keys
+
+
+def solve_level(level: Level, lava_cost: bool = False) -> Optional[Route]:
+    """ Finds the cheapest route that collects every coin in the level and
+        then leaves the maze through a door, from the level's player start.
+
+    Parameters:
+        level: The level to solve; it is not modified
+        lava_cost: Whether to count lava damage as extra cost, so the route
+                   avoids lava where the detour is cheaper than the damage
+
+    Returns:
+        The route, or None if some coin or every exit is unreachable.
+    """
+    grid = Grid(level, lava_cost)
+    num_cols = grid.num_cols
+    start_row, start_col = level.get_player_start()
+    coins = [row * num_cols + col for (row, col), item
+             in level.get_items().items() if item.get_id() == COIN]
+    points = [start_row * num_cols + start_col] + coins
+    num_points = len(points)
+
+    # Costs and coins passed between every pair of points of interest
+    trees = [grid.shortest_paths(point) for point in points]
+    coin_bits = {coin: 1 << index for index, coin in enumerate(coins, 1)}
+    dist = [[trees[i][0][point] for point in points]
+            for i in range(num_points)]
+    if any(cost == UNREACHABLE for cost in dist[0]):
+        return None
+    passed = [[0] * num_points for _ in range(num_points)]
+    for i in range(num_points):
+        parent = trees[i][1]
+        for j in range(1, num_points):
+            cell, mask = parent[points[j]], 0
+            while cell != points[i] and cell != UNREACHABLE:
+                mask |= coin_bits.get(cell, 0)
+                cell = parent[cell]
+            passed[i][j] = mask
+
+    exit_cost, exit_next, exit_keys = grid.exit_paths(
+        level.get_maze().get_door_positions())
+    exits = [exit_cost[point] for point in points]
+    all_coins = (1 << num_points) - 2
+
+    def walk_out(cell: int) -> list[str]:
+        """ Returns the keys that leave the maze from cell once the doors are
+            open.
+        """
+        keys = []
+        while exit_next[cell] != UNREACHABLE:
+            keys.append(grid.move_key(cell, exit_next[cell]))
+            cell = exit_next[cell]
+        keys.append(exit_keys[cell])
+        return keys
+
+    start = points[0]
+    if not coins and level.get_maze().is_locked() and start not in exit_keys:
+        # With no coins to collect the doors open after the first move, which
+        # therefore cannot be onto a door
+        first_moves = [
+            (grid.locked_costs[other] + exit_cost[other], other)
+            for other in grid.neighbours(start)
+            if grid.locked_costs[other] is not None
+            and exit_cost[other] != UNREACHABLE
+        ]
+        if not first_moves:
+            return None
+        cost, first = min(first_moves)
+        return Route(''.join([grid.move_key(start, first)] + walk_out(first)),
+                     cost)
+
+    spanning_trees = {}
+
+    def remaining_bound(mask: int) -> int:
+        """ Returns a lower bound on the cost of visiting every coin missing
+            from mask, starting at one of them, and then leaving the maze.
+        """
+        bound = spanning_trees.get(mask)
+        if bound is not None:
+            return bound
+        remaining = [j for j in range(1, num_points) if not mask >> j & 1]
+        if any(exits[j] == UNREACHABLE for j in remaining):
+            bound = None
+        else:
+            # Prim's algorithm over the remaining coins
+            best = {j: dist[remaining[0]][j] for j in remaining[1:]}
+            bound = 0
+            while best:
+                j = min(best, key=best.get)
+                bound += best.pop(j)
+                for k in best:
+                    best[k] = min(best[k], dist[j][k])
+            bound += min(exits[j] for j in remaining)
+        spanning_trees[mask] = bound
+        return bound
+
+    def heuristic(point: int, mask: int) -> Optional[int]:
+        """ Returns an admissible estimate of the cost still to pay. """
+        if mask == all_coins:
+            return None if exits[point] == UNREACHABLE else exits[point]
+        bound = remaining_bound(mask)
+        if bound is None:
+            return None
+        return bound + min(dist[point][j] for j in range(1, num_points)
+                           if not mask >> j & 1)
+
+    start_estimate = heuristic(0, 0)
+    if start_estimate is None:
+        return None
+    best_cost = {(0, 0): 0}
+    came_from = {}
+    heap = [(start_estimate, 0, 0, 0)]
+    while heap:
+        _, cost, point, mask = heapq.heappop(heap)
+        if cost > best_cost[(point, mask)]:
+            continue
+        if mask == all_coins:
+            route_end = (point, mask)
+            break
+        for j in range(1, num_points):
+            # Coins on the way to j are reached first by expanding them
+            if mask >> j & 1 or passed[point][j] & ~mask:
+                continue
+            new_state = (j, mask | 1 << j)
+            new_cost = cost + dist[point][j]
+            if new_cost >= best_cost.get(new_state, new_cost + 1):
+                continue
+            estimate = heuristic(*new_state)
+            if estimate is None:
+                continue
+            best_cost[new_state] = new_cost
+            came_from[new_state] = (point, mask)
+            heapq.heappush(heap, (new_cost + estimate, new_cost, *new_state))
+    else:
+        return None
+
+    # Rebuild the walk between consecutive points, then out of the maze
+    order = [route_end]
+    while order[-1] in came_from:
+        order.append(came_from[order[-1]])
+    order = [points[point] for point, _ in reversed(order)]
+    keys = []
+    for (source, target), tree in zip(zip(order, order[1:]),
+                                      (trees[points.index(cell)][1]
+                                       for cell in order)):
+        walk = [target]
+        while walk[-1] != source:
+            walk.append(tree[walk[-1]])
+        walk.reverse()
+        keys.extend(grid.move_key(a, b) for a, b in zip(walk, walk[1:]))
+    keys.extend(walk_out(order[-1]))
+
+    end_point, _ = route_end
+    return Route(''.join(keys), best_cost[route_end] + exits[end_point])
+
+
+def solve_game(game_file: str, lava_cost: bool = False
+               ) -> list[Optional[Route]]:
+    """ Solves every level in a game file.
+
+    Parameters:
+        game_file: The path to the game file
+        lava_cost: Whether to count lava damage as extra cost
+
+    Returns:
+        The route for each level in order, or None for unsolvable levels.
+    """
+    return [solve_level(level, lava_cost) for level in iter_levels(game_file)]
+
+
+def main():
+    """ Solves the game files given on the command line and replays each
+        route to check whether the player survives it without using items.
+    """
+    parser = argparse.ArgumentParser(
+        description='Find the shortest route through each MazeRunner level.')
+    parser.add_argument('games', nargs='+', help='game files to solve')
+    parser.add_argument('--lava-cost', action='store_true',
+                        help='count lava damage as extra cost')
+    args = parser.parse_args()
+
+    unsolved = 0
+    for game_file in args.games:
+        for level_num, level in enumerate(iter_levels(game_file), start=1):
+            route = solve_level(level, args.lava_cost)
+            if route is None:
+                unsolved += 1
+                print(f'{game_file} level {level_num}: no route')
+                continue
+            # Replay the route, which ignores hunger and thirst, to see if it
+            # can be survived; this uses up the level, which is not needed
+            # again
+            played = simulate(Model(game_file, [level]), route.moves,
+                              record_events=False)
+            check = 'ok' if played.model.has_won() \
+                else f'lost after {played.moves_applied} moves'
+            print(f'{game_file} level {level_num}: {len(route.moves)} moves, '
+                  f'cost {route.cost} ({check}) {route.moves}')
+    raise SystemExit(1 if unsolved else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+""" Shared set up for the correctness tests. Run them from the repository root
+    with: python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# The game's modules live at the top of the repository
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(autouse=True)
+def in_repo(monkeypatch):
+    """ Runs every test from the repository root, where the game reads its
+        game files from.
+    """
+    monkeypatch.chdir(ROOT)
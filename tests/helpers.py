@@ -0,0 +1,22 @@
+""" Helpers shared by the correctness tests. """
+from __future__ import annotations
+from pathlib import Path
+
+from a2_solution import Level
+
+ROOT = Path(__file__).resolve().parent.parent
+
+GAME_FILES = sorted(str(path.relative_to(ROOT))
+                    for path in (ROOT / 'games').glob('*.txt'))
+
+
+def describe_level(level: Level) -> tuple:
+    """ Returns everything about a level as it stands, for comparing levels
+        that were built in different ways.
+    """
+    maze = level.get_maze()
+    items = {position: item.get_id()
+             for position, item in level.get_items().items()}
+    return (level.get_dimensions(), bytes(maze.get_layout()),
+            sorted(maze.get_door_positions()), maze.is_locked(), items,
+            level.get_player_start())
@@ -0,0 +1,35 @@
+""" Tests compiling game files into level packs and loading them back. """
+import pytest
+
+from a2_solution import iter_levels
+from helpers import GAME_FILES, describe_level
+from level_pack import HEADER, LevelPack, compile_game, pack_levels
+
+
+@pytest.mark.parametrize('game_file', GAME_FILES)
+def test_pack_matches_parser(game_file):
+    parsed = [describe_level(level) for level in iter_levels(game_file)]
+    pack = LevelPack(pack_levels(iter_levels(game_file)))
+    assert len(pack) == len(parsed)
+    assert [describe_level(level) for level in pack] == parsed
+
+
+def test_pack_file_is_memory_mapped(tmp_path):
+    pack_file = str(tmp_path / 'game2.mzpk')
+    assert compile_game('games/game2.txt', pack_file) == 2
+    parsed = [describe_level(level)
+              for level in iter_levels('games/game2.txt')]
+    assert [describe_level(level) for level in LevelPack(pack_file)] == parsed
+
+
+def test_truncated_pack_is_rejected():
+    data = pack_levels(iter_levels('games/game2.txt'))
+    for size in (0, HEADER.size - 1, HEADER.size, len(data) - 1):
+        with pytest.raises(ValueError):
+            list(LevelPack(data[:size]))
+
+
+def test_missing_level():
+    pack = LevelPack(pack_levels(iter_levels('games/game1.txt')))
+    with pytest.raises(IndexError):
+        pack.get_level(len(pack))
@@ -0,0 +1,62 @@
+""" Tests the survival-aware planner on the shipped games and on corridors
+    whose length decides whether the player can survive them.
+"""
+import pytest
+
+from a2_solution import Level, Model, iter_levels
+from constants import *
+from planner import plan_game, play_actions
+from simulation import simulate
+
+
+def _corridor(length: int, items: dict[int, str]) -> Level:
+    """ Returns a one-row level with the player at the left end, a door at
+        the right end and the given items (column: item ID) in between.
+    """
+    row = [PLAYER] + [EMPTY] * (length - 2) + [DOOR]
+    for col, item_id in items.items():
+        row[col] = item_id
+    level = Level((1, length))
+    level.add_row(''.join(row))
+    return level
+
+
+@pytest.mark.parametrize('game_file', ['games/game1.txt', 'games/game2.txt',
+                                       'games/game3.txt'])
+def test_winnable_games(game_file):
+    plan, furthest = plan_game(game_file)
+    assert plan is not None
+    assert furthest == len(list(iter_levels(game_file))) - 1
+    model = Model(game_file)
+    play_actions(model, plan.actions)
+    assert model.has_won()
+
+
+@pytest.mark.parametrize('game_file', ['games/masters1.txt',
+                                       'games/masters2.txt'])
+def test_unwinnable_games(game_file):
+    plan, furthest = plan_game(game_file)
+    assert plan is None
+    assert furthest == 0  # The first level can be finished, but not the next
+
+
+def test_corridor_too_long_to_survive():
+    # Hunger and thirst rise every 5 moves, so 50 moves is the most that can
+    # be made without food and water
+    plan, _ = plan_game('corridor.txt', [_corridor(50, {})])
+    assert plan is not None and plan.num_moves == 49
+    assert plan_game('corridor.txt', [_corridor(51, {})]) == (None, -1)
+
+    # The only way through does lose the game
+    result = simulate(Model('corridor.txt', [_corridor(51, {})]), 'd' * 50)
+    assert result.model.has_lost()
+
+
+def test_corridor_survived_with_items():
+    items = {20: APPLE, 21: WATER}
+    plan, _ = plan_game('corridor.txt', [_corridor(51, items)])
+    assert plan is not None
+    assert any(action.startswith('i ') for action in plan.actions)
+    model = Model('corridor.txt', [_corridor(51, items)])
+    play_actions(model, plan.actions)
+    assert model.has_won()
@@ -0,0 +1,130 @@
+""" Tests writing input logs and reading and replaying them. """
+import itertools
+import shutil
+
+import pytest
+
+from a2_solution import Model
+from constants import MOVE_DELTAS
+from recording import (LEVEL_UP, InputRecorder, iter_sessions, read_log,
+                       replay_session)
+
+GAME_FILE = 'games/game2.txt'
+# Collects the coins on level 1 and walks part way into level 2
+MOVES = 'ddwwdddddddd'
+
+
+def _record(path, game_file=GAME_FILE, moves=MOVES, item=None, load=None):
+    """ Plays moves, then uses an item and loads a snapshot if given,
+        recording each input to a new session of the log at path.
+
+    Returns:
+        The model the inputs were played on.
+    """
+    clock = itertools.count(0, 250_000_000)
+    recorder = InputRecorder(str(path), game_file, clock=lambda: next(clock))
+    model = Model(GAME_FILE)
+    for move in moves:
+        model.move_player(MOVE_DELTAS[move])
+        recorder.record_move(move)
+        if model.did_level_up():
+            recorder.record_level_up(model.get_level_num())
+    if item is not None and model.use_item(item) is not None:
+        recorder.record_item(item)
+    if load is not None:
+        model = Model.from_state(load)
+        recorder.record_load(load)
+    recorder.close()
+    return model
+
+
+def test_replay_matches_play(tmp_path):
+    path = tmp_path / 'log.mzrl'
+    played = _record(path)
+    session, = read_log(str(path))
+    assert session.game_file == GAME_FILE
+    assert [record.kind for record in session.records
+            if record.kind != LEVEL_UP] == list(MOVES)
+    assert [record.time for record in session.records] == \
+        [0.25 * step for step in range(1, len(session.records) + 1)]
+
+    result = replay_session(session)
+    assert result.divergence is None
+    assert result.inputs_applied == len(MOVES)
+    assert result.model.get_state() == played.get_state()
+
+
+def test_replay_with_load(tmp_path):
+    path = tmp_path / 'log.mzrl'
+    snapshot = Model(GAME_FILE).get_state()
+    played = _record(path, load=snapshot)
+    result = replay_session(read_log(str(path))[0])
+    assert result.model.get_state() == played.get_state() == snapshot
+
+
+def _three_sessions(path, **middle):
+    """ Records three sessions and returns the log and where the middle
+        session starts and ends.
+    """
+    _record(path)
+    start = path.stat().st_size
+    _record(path, moves='dd', load=Model(GAME_FILE).get_state(), **middle)
+    end = path.stat().st_size
+    _record(path, moves='sss')
+    return path.read_bytes(), start, end
+
+
+def test_session_cut_short_in_the_middle(tmp_path):
+    data, start, end = _three_sessions(tmp_path / 'log.mzrl')
+    full = [len(session.records) for session in iter_sessions(data)]
+    for cut in range(start, end):
+        # The game stopped part way through the middle session, then ran
+        # again
+        sessions = list(iter_sessions(data[:cut] + data[end:]))
+        assert len(sessions[0].records) == full[0]
+        assert len(sessions[-1].records) == full[-1]
+        assert len(sessions) in (2, 3)
+
+
+def test_magic_number_in_payloads(tmp_path):
+    """ A game file path and a loaded snapshot may contain the bytes of the
+        magic number.
+    """
+    game_file = tmp_path / 'MZRL' / 'game2.txt'
+    game_file.parent.mkdir()
+    shutil.copy(GAME_FILE, game_file)
+    game_file = str(game_file)
+    snapshot = Model(game_file).get_state()
+
+    path = tmp_path / 'log.mzrl'
+    _record(path, game_file=game_file, load=snapshot)
+    first_end = path.stat().st_size
+    _record(path)
+    data = path.read_bytes()
+    sessions = list(iter_sessions(data))
+    assert [session.game_file for session in sessions] == \
+        [game_file, GAME_FILE]
+    assert sessions[0].records[-1].value == snapshot
+
+    # Cutting the first session short still leaves the second
+    for cut in range(first_end - 40, first_end):
+        sessions = list(iter_sessions(data[:cut] + data[first_end:]))
+        assert sessions[-1].game_file == GAME_FILE
+        assert len(sessions[-1].records) == len(MOVES) + 1
+
+
+def test_log_cut_short_at_the_end(tmp_path):
+    path = tmp_path / 'log.mzrl'
+    _record(path)
+    data = path.read_bytes()
+    assert list(iter_sessions(b'MZ')) == []
+    for cut in range(1, len(data)):
+        sessions = list(iter_sessions(data[:cut]))
+        assert all(session.game_file == GAME_FILE for session in sessions)
+
+
+@pytest.mark.parametrize('data', [b'hello', b'MZRL\x09\x00\x00'],
+                         ids=['not_a_log', 'newer_version'])
+def test_not_a_log(data):
+    with pytest.raises(ValueError):
+        list(iter_sessions(data))
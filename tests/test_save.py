@@ -0,0 +1,69 @@
+""" Tests saving games as snapshots and restoring them. """
+import json
+import random
+
+import pytest
+
+from a2_solution import Model
+from constants import MOVE_DELTAS
+from helpers import GAME_FILES
+from planner import plan_game, play_actions
+
+
+def _round_trip(model: Model) -> Model:
+    """ Saves a game to JSON text and loads it back, as the save menu does. """
+    return Model.from_state(json.loads(json.dumps(model.get_state())))
+
+
+@pytest.mark.parametrize('game_file', GAME_FILES)
+def test_round_trip_at_start(game_file):
+    model = Model(game_file)
+    assert _round_trip(model).get_state() == model.get_state()
+
+
+@pytest.mark.parametrize('game_file', ['games/game1.txt', 'games/game2.txt',
+                                       'games/game3.txt'])
+def test_round_trip_along_a_win(game_file):
+    """ Saves at every step of a winning plan, which collects and uses items,
+        unlocks doors and reaches later levels.
+    """
+    plan, _ = plan_game(game_file)
+    model = Model(game_file)
+    for action in plan.actions:
+        play_actions(model, [action])
+        if model.has_won():
+            break
+        assert _round_trip(model).get_state() == model.get_state()
+    assert model.has_won()
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_restored_game_plays_the_same(seed):
+    rng = random.Random(seed)
+    deltas = [MOVE_DELTAS[move]
+              for move in rng.choices(tuple(MOVE_DELTAS), k=200)]
+    model = Model('games/game2.txt')
+    for delta in deltas[:50]:
+        model.move_player(delta)
+    restored = _round_trip(model)
+    for delta in deltas[50:]:
+        model.move_player(delta)
+        restored.move_player(delta)
+        assert restored.get_state() == model.get_state()
+        assert restored.has_won() == model.has_won()
+        assert restored.has_lost() == model.has_lost()
+
+
+@pytest.mark.parametrize('change', [
+    lambda state: state.update(tiles=state['tiles'].rsplit('\n', 1)[0]),
+    lambda state: state.update(player_position=[99, 0]),
+    lambda state: state.update(player_start=[0, -1]),
+    lambda state: state['items'].append([0, 99, 'C']),
+    lambda state: state.update(level_num=5),
+], ids=['missing_row', 'player_off_maze', 'start_off_maze', 'item_off_maze',
+        'missing_level'])
+def test_bad_snapshot_is_rejected(change):
+    state = Model('games/game2.txt').get_state()
+    change(state)
+    with pytest.raises(ValueError):
+        Model.from_state(state)
@@ -0,0 +1,90 @@
+""" Tests the shortest route solver against replays and a brute-force search.
+"""
+from collections import deque
+
+import pytest
+
+from a2_solution import Level, Model, iter_levels
+from constants import *
+from generator import generate_levels
+from helpers import GAME_FILES
+from solver import solve_level
+
+
+def _replay_ignoring_stats(game_file: str, level: Level, moves: str) -> Model:
+    """ Plays moves through a one-level game, keeping the player fed and
+        healthy, since routes do not take hunger, thirst or damage into
+        account.
+    """
+    model = Model(game_file, [level])
+    player = model.get_player()
+    for move in moves:
+        player.change_health(MAX_HEALTH)
+        player.change_hunger(-MAX_HUNGER)
+        player.change_thirst(-MAX_THIRST)
+        model.move_player(MOVE_DELTAS[move])
+        if model.has_won() or model.has_lost():
+            break
+    return model
+
+
+def _fewest_moves(level: Level) -> int:
+    """ Returns the fewest moves that win a level, found by BFS over every
+        (position, coins collected) pair, or None if it cannot be won.
+    """
+    maze = level.get_maze()
+    num_rows, num_cols = level.get_dimensions()
+    coins = [position for position, item in level.get_items().items()
+             if item.get_id() == COIN]
+    bits = {position: 1 << index for index, position in enumerate(coins)}
+    all_coins = (1 << len(coins)) - 1
+    doors = set(maze.get_door_positions())
+
+    start = (level.get_player_start(), 0, False)
+    seen, queue = {start}, deque([(start, 0)])
+    while queue:
+        (position, mask, unlocked), moves = queue.popleft()
+        row, col = position
+        for row_delta, col_delta in MOVE_DELTAS.values():
+            target = (row + row_delta, col + col_delta)
+            if not (0 <= target[0] < num_rows and 0 <= target[1] < num_cols):
+                if position in doors:
+                    return moves + 1
+                continue
+            if maze.get_tile(target).get_id() == WALL \
+                    or (target in doors and not unlocked):
+                continue
+            new_mask = mask | bits.get(target, 0)
+            # Doors unlock after any move that leaves no coins to collect
+            state = (target, new_mask, new_mask == all_coins)
+            if state not in seen:
+                seen.add(state)
+                queue.append((state, moves + 1))
+    return None
+
+
+@pytest.mark.parametrize('game_file', GAME_FILES)
+def test_routes_win(game_file):
+    for level_num, level in enumerate(iter_levels(game_file)):
+        route = solve_level(level)
+        assert route is not None, f'no route for level {level_num}'
+        assert route.cost == len(route.moves)
+        model = _replay_ignoring_stats(game_file, level, route.moves)
+        assert model.has_won(), f'route for level {level_num} does not win'
+
+
+@pytest.mark.parametrize('seed', range(0, 60, 3))
+def test_routes_are_shortest(seed):
+    for level in generate_levels((7, 9), 3, seed, lava_density=0.1,
+                                 item_density=0.15):
+        route = solve_level(level)
+        fewest = _fewest_moves(level)
+        assert (route and len(route.moves)) == fewest
+
+
+def test_unreachable_coin():
+    level = Level((3, 5))
+    for row in ('#####', 'P#C D', '#####'):
+        level.add_row(row)
+    assert solve_level(level) is None
+    assert _fewest_moves(level) is None
@@ -0,0 +1,201 @@
+""" Steps many players through one level at once using NumPy arrays.
+
+Every player plays its own copy of the level: items a player picks up stay on
+the maze for everyone else, and each player's doors unlock once that player
+has collected all of the level's coins. The rules are those of
+Model.move_player; a player who steps off the maze through a door has finished
+the level and stops moving, as does a player who has lost.
+"""
+from __future__ import annotations
+from typing import Union
+
+import numpy as np
+
+from a2_solution import Level
+from constants import *
+
+# Move codes used by step, in the order of this table
+MOVE_ORDER = (UP, DOWN, LEFT, RIGHT)
+_DELTAS = np.array([MOVE_DELTAS[move] for move in MOVE_ORDER], dtype=np.int32)
+
+# Maps the byte of each move key to its move code, and anything else to -1
+_CODES_BY_BYTE = np.full(256, -1, dtype=np.int8)
+for _code, _move in enumerate(MOVE_ORDER):
+    _CODES_BY_BYTE[ord(_move)] = _code
+del _code, _move
+
+
+def encode_moves(moves: Union[str, bytes]) -> np.ndarray:
+    """ Converts move keys (e.g. "wwdds") into the move codes used by step.
+
+    Parameters:
+        moves: One move key per character or byte
+
+    Raises:
+        ValueError: If moves contains something other than a move key.
+    """
+    if isinstance(moves, str):
+        moves = moves.encode('ascii', errors='replace')
+    codes = _CODES_BY_BYTE[np.frombuffer(moves, dtype=np.uint8)]
+    if (codes < 0).any():
+        raise ValueError("Moves contain something other than a move key")
+    return codes
+
+
+class VectorSimulation:
+    """ The state of N players on one level, held as NumPy arrays. """
+    def __init__(self, level: Level, num_players: int,
+                 health: int = MAX_HEALTH, hunger: int = 0, thirst: int = 0,
+                 num_moves: int = 0) -> None:
+        """ Places every player at the level's start with the given stats.
+
+        Parameters:
+            level: The level to play; it is not modified
+            num_players: The number of players, N
+            health: The starting HP of every player
+            hunger: The starting hunger of every player
+            thirst: The starting thirst of every player
+            num_moves: The number of moves already made, which sets when
+                       hunger and thirst next rise
+        """
+        num_rows, num_cols = level.get_dimensions()
+        self._dimensions = (num_rows, num_cols)
+        grid = np.frombuffer(level.get_maze().get_layout(), dtype=np.uint8)
+        grid = grid.reshape(num_rows, num_cols)
+        self._walls = grid == ord(WALL)
+        self._doors = grid == ord(DOOR)
+        self._damage = np.where(grid == ord(LAVA), LAVA_DAMAGE, 0).astype(
+            np.int32)
+
+        # Items are numbered in the order of the level's item dict
+        items = level.get_items()
+        self._item_ids = [item.get_id() for item in items.values()]
+        self._item_index = np.full((num_rows, num_cols), -1, dtype=np.int32)
+        for index, (row, col) in enumerate(items):
+            self._item_index[row, col] = index
+        self._is_coin = np.array([item_id == COIN
+                                  for item_id in self._item_ids], dtype=bool)
+        num_words = max(1, (len(items) + 63) // 64)
+
+        start_row, start_col = level.get_player_start()
+        self._rows = np.full(num_players, start_row, dtype=np.int32)
+        self._cols = np.full(num_players, start_col, dtype=np.int32)
+        self._health = np.full(num_players, health, dtype=np.int32)
+        self._hunger = np.full(num_players, hunger, dtype=np.int32)
+        self._thirst = np.full(num_players, thirst, dtype=np.int32)
+        self._num_moves = np.full(num_players, num_moves, dtype=np.int64)
+        self._collected = np.zeros((num_players, num_words), dtype=np.uint64)
+        self._coins_left = np.full(num_players, self._is_coin.sum(),
+                                   dtype=np.int32)
+        self._unlocked = np.zeros(num_players, dtype=bool)
+        self._finished = np.zeros(num_players, dtype=bool)
+        self._lost = self._has_lost()
+
+    def _has_lost(self) -> np.ndarray:
+        """ Returns which players have lost, as in Model.has_lost. """
+        return (self._health <= 0) | (self._hunger >= MAX_HUNGER) \
+            | (self._thirst >= MAX_THIRST)
+
+    def step(self, moves: np.ndarray) -> None:
+        """ Advances every player by one move. Players who have finished the
+            level or lost are left as they are.
+
+        Parameters:
+            moves: The move code (an index into MOVE_ORDER) for each player
+        """
+        num_rows, num_cols = self._dimensions
+        active = ~(self._finished | self._lost)
+        deltas = _DELTAS[moves]
+        rows = self._rows + deltas[:, 0]
+        cols = self._cols + deltas[:, 1]
+
+        # Players can only leave the maze from a door
+        inside = (rows >= 0) & (rows < num_rows) & (cols >= 0) \
+            & (cols < num_cols)
+        on_door = self._doors[self._rows, self._cols]
+        self._finished |= active & ~inside & on_door
+
+        # Clamp so positions outside the maze can still index the grids
+        rows = np.clip(rows, 0, num_rows - 1)
+        cols = np.clip(cols, 0, num_cols - 1)
+        blocked = self._walls[rows, cols] \
+            | (self._doors[rows, cols] & ~self._unlocked)
+        moved = np.flatnonzero(active & inside & ~blocked)
+        if moved.size == 0:
+            return
+        rows, cols = rows[moved], cols[moved]
+
+        self._num_moves[moved] += 1
+        tired = moved[self._num_moves[moved] % 5 == 0]
+        self._hunger[tired] = np.minimum(self._hunger[tired] + 1, MAX_HUNGER)
+        self._thirst[tired] = np.minimum(self._thirst[tired] + 1, MAX_THIRST)
+        self._health[moved] = np.clip(
+            self._health[moved] - 1 - self._damage[rows, cols], 0, MAX_HEALTH)
+        self._rows[moved] = rows
+        self._cols[moved] = cols
+
+        # Pick up any item not already collected by that player
+        items = self._item_index[rows, cols]
+        on_item = items >= 0
+        pickers, items = moved[on_item], items[on_item]
+        words = items >> 6
+        bits = np.left_shift(np.uint64(1), (items & 63).astype(np.uint64))
+        new = (self._collected[pickers, words] & bits) == 0
+        pickers, items = pickers[new], items[new]
+        self._collected[pickers, words[new]] |= bits[new]
+        coin_pickers = pickers[self._is_coin[items]]
+        self._coins_left[coin_pickers] -= 1
+
+        # As in Model.attempt_collect_item, doors unlock after any move made
+        # once no coins are left
+        self._unlocked[moved] |= self._coins_left[moved] == 0
+        self._lost |= self._has_lost()
+
+    def run(self, moves: np.ndarray) -> None:
+        """ Advances every player by a sequence of moves.
+
+        Parameters:
+            moves: Move codes of shape (#ticks, N); row t holds every player's
+                   move for tick t
+        """
+        for tick_moves in moves:
+            self.step(tick_moves)
+
+    def get_positions(self) -> np.ndarray:
+        """ Returns the (row, column) of every player, shape (N, 2). """
+        return np.stack((self._rows, self._cols), axis=1)
+
+    def get_stats(self) -> np.ndarray:
+        """ Returns the (HP, hunger, thirst) of every player, shape (N, 3). """
+        return np.stack((self._health, self._hunger, self._thirst), axis=1)
+
+    def get_num_moves(self) -> np.ndarray:
+        """ Returns the number of moves each player has made. """
+        return self._num_moves
+
+    def get_collected(self) -> np.ndarray:
+        """ Returns which items each player has collected, shape (N, #items),
+            with items numbered in the order of the level's item dict.
+        """
+        num_items = len(self._item_ids)
+        bits = np.unpackbits(self._collected.view(np.uint8), axis=1,
+                             bitorder='little')
+        return bits[:, :num_items].astype(bool)
+
+    def get_item_counts(self, item_id: str) -> np.ndarray:
+        """ Returns how many items with the given ID each player has collected.
+
+        Parameters:
+            item_id: The ID of the kind of item to count
+        """
+        kinds = np.array([other == item_id for other in self._item_ids],
+                         dtype=bool)
+        return self.get_collected()[:, kinds].sum(axis=1)
+
+    def get_finished(self) -> np.ndarray:
+        """ Returns which players have left the level through a door. """
+        return self._finished
+
+    def get_lost(self) -> np.ndarray:
+        """ Returns which players have lost. """
+        return self._lost